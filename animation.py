@@ -0,0 +1,89 @@
+import os
+from threading import Lock
+
+import pygame as pg
+
+from assets import asset_cache
+from palette import BLACK, TRANSPARENT
+
+
+FACINGS = ['up', 'down', 'left', 'right']
+
+
+class AnimationSet():
+    """Frames of one entity type, shared by every
+    entity of that type and never modified.
+
+    [frames] maps each action to one tuple of
+    frames per facing (up, down, left, right).
+    [foreground] is the part drawn over the
+    trainer, keyed on black, if the type has one.
+    """
+    __slots__ = ('foreground', 'frames', 'size')
+
+    def __init__(self, frames: dict[str, tuple[tuple[pg.Surface]]], foreground: pg.Surface | None = None):
+        self.foreground = foreground
+        self.frames     = frames
+        self.size       = frames['stand'][0][0].get_size()  # Of the first frame
+
+
+animation_sets = {}  # (entity type, name, options): AnimationSet
+animation_lock = Lock()
+
+
+def clear_animation_sets():
+    with animation_lock:
+        animation_sets.clear()
+
+
+def doodad_animations(name: str, animated: bool, in_front_of_trainer: bool) -> AnimationSet:
+    """Animated doodads are 16 pixel wide frames in
+    a row; others are one frame the width of the
+    image. Every facing uses the same frames.
+    """
+    def build() -> AnimationSet:
+        filepath = os.path.join('lib', 'doodad', f'{name}.png')
+        sheet_width = 16 if animated else asset_cache.image(filepath).get_width()
+        frames = tuple(asset_cache.frames(filepath, frame_width=sheet_width, colorkey=TRANSPARENT))
+
+        foreground = None
+        if in_front_of_trainer:
+            foreground = pg.Surface((sheet_width, 32))
+            foreground.blit(frames[0], (0, 0))
+            foreground.set_colorkey(BLACK)
+
+        return AnimationSet({'stand': (frames,) * 4}, foreground)
+
+    return shared_set(('doodad', name, animated, in_front_of_trainer), build)
+
+
+def shared_set(key: tuple, build) -> AnimationSet:
+    """The AnimationSet for [key], built by [build]
+    the first time it is asked for
+    """
+    with animation_lock:
+        if key in animation_sets:
+            return animation_sets[key]
+
+    animation_set = build()  # Outside the lock; Areas load on worker threads
+
+    with animation_lock:
+        return animation_sets.setdefault(key, animation_set)
+
+
+def unit_animations(name: str, actions: tuple[str]) -> AnimationSet:
+    """Unit sheets are 16 pixel wide frames in a
+    row, one sheet per action and facing. Right
+    uses the left sheet, mirrored.
+    """
+    def build() -> AnimationSet:
+        frames = {}
+        for action in actions:
+            frames[action] = tuple(
+                tuple(asset_cache.frames(
+                    os.path.join('lib', 'unit', f'{name}_{action}_{"left" if facing == "right" else facing}.png'),
+                    frame_width=16, flip=facing == 'right', colorkey=TRANSPARENT))
+                for facing in FACINGS)
+        return AnimationSet(frames)
+
+    return shared_set(('unit', name, actions), build)
@@ -1,44 +1,174 @@
-import json
 import os
 
 import pygame as pg
 from pygame.math import Vector2
 
-from palette import TRANSPARENT
+from assets import asset_cache
+from palette import BLACK, TRANSPARENT
 from doodad import Doodad
+from entity import Entity
+from map_registry import get_map_registry
+from passability import load_passability
+from render_list import RenderList
+from tilemap import TileMap
+
+
+CELL_QUERY_LIMIT = 64  # Cached get_doodads_in_rect results
+GRID_CELL = 64  # Spatial grid cell size, in pixels
+NO_EVENTS = ()
+TILE_EPSILON = 1e-6  # Matches pygame's Vector2 comparison tolerance
 
 
 class Area:
     def __init__(self, name: str, start_location: tuple[int] = (0, 0)):
         self.name = name
 
-        self.doodads        = []
-        self.events         = []
-        self.formatted_name = self.name.lower().replace(' ', '_')
-        self.image          = None
-        self.map_data       = {}
-        self.passable       = None
-        self.rect           = None
-        self.run_enabled    = True
-        self.start_location = Vector2(start_location)
+        self.animated_doodads = []
+        self.background       = None  # Base map with static doodads baked in, unless tiled
+        self.cell_queries     = {}  # (left, top, right, bottom) cells: doodads
+        self.doodad_grid      = {}  # (cell x, cell y): static doodads overlapping that cell
+        self.doodad_order     = {}  # doodad: index in self.static_doodads
+        self.doodads          = []
+        self.event_index      = {}  # (x, y, type): events sorted by priority
+        self.events           = []
+        self.foreground       = None  # Foreground parts of static doodads, BLACK colorkeyed, unless tiled
+        self.formatted_name   = self.name.lower().replace(' ', '_')
+        self.image            = None
+        self.map_data         = {}
+        self.passable         = None
+        self.rect             = None
+        self.render_list      = RenderList()  # Animated doodads and units, in draw order
+        self.run_enabled      = True
+        self.start_location   = Vector2(start_location)
+        self.static_doodads   = []
+        self.tilemap          = None  # TileMap, if the area is stored as tiles
+        self.warps            = []  # ((x, y), destination area name)
 
         self.load_resources()
 
+    def background_blits(self, viewport: pg.Rect, camera_offset: tuple[float]) -> list[tuple]:
+        """(surface, dest, area) blits drawing the map
+        and its static doodads inside [viewport] (in
+        map pixels) at [camera_offset]
+        """
+        if self.tilemap:
+            return self.tilemap.blits('background', viewport, camera_offset)
+        return [(self.background, camera_offset, None)]
+
+    def bake_layers(self):
+        """Pre-render static doodads into the
+        background, and their foreground parts into
+        a separate overlay, so they cost no per-frame
+        blits of their own.
+        """
+        if self.tilemap:
+            for doodad in self.static_doodads:
+                self.tilemap.bake('background', doodad.image, doodad.coords())
+                if doodad.foreground_image:
+                    self.tilemap.bake('foreground', doodad.foreground_image, doodad.coords())
+            return
+
+        self.background = self.image.copy()
+        self.foreground = pg.Surface(self.image.get_size())
+        self.foreground.fill(BLACK)
+        self.foreground.set_colorkey(BLACK)
+
+        for doodad in self.static_doodads:
+            self.background.blit(doodad.image, doodad.coords())
+            if doodad.foreground_image:
+                self.foreground.blit(doodad.foreground_image, doodad.coords())
+
     def dimensions(self) -> tuple[int]:
-        return self.image.get_size()
+        return self.rect.size
+
+    def foreground_blits(self, rect: pg.Rect, camera_offset: tuple[float]) -> list[tuple]:
+        """Blits drawing the foreground parts of static
+        doodads inside [rect] (in map pixels)
+        """
+        if self.tilemap:
+            return self.tilemap.blits('foreground', rect, camera_offset)
+        return [(self.foreground, (rect.x + camera_offset[0], rect.y + camera_offset[1]), rect)]
+
+    def get_doodads_in_rect(self, rect: pg.Rect) -> list[Doodad]:
+        """Static doodads in the grid cells overlapping
+        [rect] (in map pixels), in draw (Y) order. Results
+        are cached per span of cells and must not be
+        modified.
+        """
+        cells = (rect.left // GRID_CELL, rect.top // GRID_CELL,
+                 (rect.right - 1) // GRID_CELL, (rect.bottom - 1) // GRID_CELL)
+        try:
+            return self.cell_queries[cells]
+        except KeyError:
+            pass
+
+        found = set()
+        for x in range(cells[0], cells[2] + 1):
+            for y in range(cells[1], cells[3] + 1):
+                found.update(self.doodad_grid.get((x, y), ()))
+
+        if len(self.cell_queries) == CELL_QUERY_LIMIT:
+            self.cell_queries.clear()
+        self.cell_queries[cells] = sorted(found, key=self.doodad_order.__getitem__)
+        return self.cell_queries[cells]
+
+    def get_occluders(self, entity: Entity, alpha: float = 1.0) -> list[tuple[Doodad, pg.Rect]]:
+        """Static doodads that draw in front of
+        [entity], each with the part of it that
+        overlaps the entity (in map pixels). Since
+        they are baked into the background, these
+        parts must be redrawn over the entity.
+        """
+        rect = entity.map_rect(alpha)
+        occluders = []
+        for doodad in self.get_doodads_in_rect(rect):
+            if doodad.grid_location.y > entity.grid_location.y:
+                overlap = doodad.map_rect().clip(rect)
+                if overlap:
+                    occluders.append((doodad, overlap))
+
+        return occluders
 
     def get_tile_events(self, location: Vector2, active: bool) -> list[dict]:
-        events = [e for e in self.events if e['location'] == location]
-        if active:
-            return [e for e in events if e['type'] == 'active']
-        else:
-            return [e for e in events if e['type'] == 'passive']
+        """Events of one type on the tile at
+        [location], sorted by priority. Locations
+        mid-step never match a tile, but ones within
+        float error of it do (like Vector2 equality).
+        """
+        x, y = round(location.x), round(location.y)
+        if abs(location.x - x) >= TILE_EPSILON or abs(location.y - y) >= TILE_EPSILON:
+            return NO_EVENTS
+
+        return self.event_index.get((x, y, 'active' if active else 'passive'), NO_EVENTS)
+
+    def index_doodads(self):
+        self.doodad_grid = {}
+        self.cell_queries = {}
+        self.doodad_order = {d: n for n, d in enumerate(self.static_doodads)}
+
+        for doodad in self.static_doodads:
+            rect = doodad.map_rect()
+            for x in range(rect.left // GRID_CELL, (rect.right - 1) // GRID_CELL + 1):
+                for y in range(rect.top // GRID_CELL, (rect.bottom - 1) // GRID_CELL + 1):
+                    self.doodad_grid.setdefault((x, y), []).append(doodad)
+
+    def index_events(self):
+        self.event_index = {}
+        for event in self.events:
+            key = (*event['location'], event['type'])
+            self.event_index.setdefault(key, []).append(event)
+
+        for events in self.event_index.values():
+            events.sort(key=lambda e: e['event'].get('priority', 0))
+
+        self.warps = [(tuple(e['location']), e['event']['destinationMap']) for e in self.events
+                      if e['type'] == 'passive' and e['event']['type'] == 'changeMap']
 
     def is_passable(self, location: Vector2):
         if location.x < 0 or location.y < 0:  # Left/top edges of the map
             return False
         try:
-            return bool(self.passable[int(location.x)][int(location.y)])
+            return bool(self.passable[int(location.x), int(location.y)])
         except IndexError:
             return False
 
@@ -46,8 +176,13 @@ class Area:
         return self.run_enabled
 
     def load_base_map(self):
-        self.image = pg.image.load(
-            os.path.join('lib', 'maps', f'{self.formatted_name}.png'))
+        if 'tilemap' in self.map_data:
+            self.tilemap = TileMap.load(self.map_data['tilemap'])
+            self.rect = self.tilemap.rect
+            return
+
+        self.image = asset_cache.image(
+            os.path.join('lib', 'maps', f'{self.formatted_name}.png'), convert=True)
         self.rect = self.image.get_rect()
 
     def load_doodads(self):
@@ -60,33 +195,35 @@ class Area:
                                            doodad['animated']))
 
         self.doodads.sort(key=lambda d: d.grid_location.y)
+        self.animated_doodads = [d for d in self.doodads if d.animated]
+        self.static_doodads = [d for d in self.doodads if not d.animated]
+        self.index_doodads()
+
+        self.render_list = RenderList()
+        for doodad in self.animated_doodads:
+            self.render_list.add(doodad)
 
     def load_events(self):
         self.events = self.map_data['events']
+        self.index_events()
 
     def load_map_data(self):
-        with open(os.path.join('data', 'maps.json')) as f:
-            data = json.load(f)
-
-        self.map_data = next(
-            m for m in data['areas'] if m['name'] == self.name)
+        self.map_data = get_map_registry().get(self.name)
 
     def load_resources(self):
         self.load_map_data()
         self.load_base_map()
         self.load_doodads()
+        self.bake_layers()
         self.load_events()
 
         self.start_location = Vector2(self.map_data['startLocation'])
         self.run_enabled = self.map_data['allowRunning']
 
-        # Boolean 2D array, such that each (x, y) is passable (1) or not (0)
-        filename = f'{self.formatted_name}_passable.png'
-        array = pg.surfarray.pixels2d(
-            pg.image.load(os.path.join('lib', 'maps', filename)).convert(16))
-        array.flat = [bool(n) for n in array.flat]
-        self.passable = array
+        # Boolean 2D array, such that each (x, y) is passable (True) or not
+        self.passable = load_passability(
+            os.path.join('lib', 'maps', f'{self.formatted_name}_passable.png'))
 
     def update(self):
-        for doodad in self.doodads:
+        for doodad in self.animated_doodads:
             doodad.update()
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from area import Area
+from map_registry import get_map_registry
+
+
+DEFAULT_POOL_SIZE = 4
+
+
+class AreaPool():
+    """Keeps recently visited Areas (images, doodads,
+    passability and event index) alive, so warping
+    back and forth reuses them instead of rebuilding.
+
+    Areas can also be prefetched: built on a worker
+    thread ahead of time, then handed over by get().
+    Finished prefetches join the pool on collect(),
+    so ones that are never asked for still count
+    towards [size].
+    """
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, workers: int = 1):
+        self.size     = size
+        self.workers  = workers
+
+        self.areas    = OrderedDict()  # name: Area, least recently used first
+        self.executor = None
+        self.pending  = {}  # name: Future of an Area being built off-thread
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.areas
+
+    def add(self, name: str, area: Area):
+        self.areas[name] = area
+        while len(self.areas) > self.size:
+            self.areas.popitem(last=False)
+
+    def clear(self):
+        self.areas.clear()
+
+    def collect(self):
+        """Move finished prefetches into the pool.
+        Failed ones stay pending, so get() rebuilds
+        them and raises the error on this thread. A
+        pool of size 0 leaves them all for get().
+        """
+        if not self.size:
+            return
+
+        for name, future in list(self.pending.items()):
+            if future.done() and not future.cancelled() and future.exception() is None:
+                del self.pending[name]
+                self.add(name, future.result())
+
+    def get(self, name: str) -> Area:
+        """Return the named Area, waiting for its
+        prefetch to finish if one is running.
+        """
+        self.collect()
+        try:
+            self.areas.move_to_end(name)
+            return self.areas[name]
+        except KeyError:
+            pass
+
+        area = None
+        future = self.pending.pop(name, None)
+        if future:
+            try:
+                area = future.result()
+            except Exception:
+                pass  # Rebuild below, so the error is raised on this thread
+
+        if area is None:
+            area = Area(name)
+
+        self.add(name, area)
+        return area
+
+    def prefetch(self, name: str):
+        """Start building [name] on a worker thread,
+        unless it is already pooled, pending or not a
+        known area.
+        """
+        self.collect()
+        if name in self.areas or name in self.pending or name not in get_map_registry():
+            return
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                               thread_name_prefix='area_prefetch')
+        self.pending[name] = self.executor.submit(Area, name)
+
+    def ready(self, name: str) -> bool:
+        """Whether get([name]) would return without
+        building or waiting
+        """
+        return name in self.areas or (name in self.pending and self.pending[name].done())
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        self.pending.clear()
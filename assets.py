@@ -0,0 +1,214 @@
+from collections import OrderedDict
+from threading import Lock
+
+import pygame as pg
+
+from atlas import Atlas
+from pack import get_asset_pack
+
+
+DEFAULT_BUDGET = 32 * 1024 * 1024  # Bytes
+
+
+def can_convert() -> bool:
+    """convert() needs a display mode to be set;
+    until then (and in tools) surfaces are left in
+    the format they were loaded in.
+    """
+    return pg.display.get_surface() is not None
+
+
+def surface_size(asset: pg.Surface | list[pg.Surface]) -> int:
+    """Approximate number of bytes held by a
+    surface, or by a list of surfaces. Views into
+    an atlas hold none of their own.
+    """
+    if isinstance(asset, pg.Surface):
+        if asset.get_parent():
+            return 0
+        return asset.get_pitch() * asset.get_height()
+    return sum(surface_size(a) for a in asset)
+
+
+class AssetCache():
+    """Process-wide LRU cache of decoded images.
+
+    Entries are keyed by file path plus the
+    options used to prepare them. Cached surfaces
+    are shared, so callers must copy() one before
+    drawing onto it. Safe to use from worker
+    threads; decoding happens outside the lock.
+    Images packed by atlas.py are views into their
+    atlas instead of decoded files.
+    """
+    def __init__(self, budget: int = DEFAULT_BUDGET):
+        self.budget  = budget
+
+        self.atlas   = None  # Atlas, or False if none was built
+        self.entries = OrderedDict()  # key: (asset, size in bytes)
+        self.hits    = 0
+        self.lock    = Lock()
+        self.misses  = 0
+        self.size    = 0
+
+    def base_image(self, filepath: str) -> pg.Surface:
+        """A view of [filepath] in the atlas, its
+        pixels in the asset pack, or the decoded file
+        if it was packed in neither
+        """
+        atlas = self.get_atlas()
+        view = atlas.image(filepath) if atlas else None
+        if view:
+            return view
+
+        asset_pack = get_asset_pack()
+        return (asset_pack and asset_pack.image(filepath)) or pg.image.load(filepath)
+
+    def clear(self):
+        """Drop every cached image and the atlases,
+        which are decoded again on next use
+        """
+        with self.lock:
+            self.atlas = None
+            self.entries.clear()
+            self.size = 0
+
+    def evict(self):
+        """Drop least recently used entries until
+        the cache fits its budget. The newest entry
+        is always kept, however large it is.
+        """
+        while self.size > self.budget and len(self.entries) > 1:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.size -= size
+
+    def fetch(self, key: tuple, loader) -> pg.Surface | list[pg.Surface]:
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key][0]
+            self.misses += 1
+
+        asset = loader()
+
+        with self.lock:
+            if key in self.entries:  # Another thread loaded it meanwhile
+                return self.entries[key][0]
+            size = surface_size(asset)
+            self.entries[key] = (asset, size)
+            self.size += size
+            self.evict()
+
+        return asset
+
+    def frames(self, filepath: str, frame_width: int, flip: bool = False,
+               colorkey: pg.Color | None = None) -> list[pg.Surface]:
+        """Slice a horizontal sprite sheet into
+        frames of [frame_width], optionally
+        mirroring each frame. Frames are converted
+        to the display format, and [colorkey] is
+        applied once here with RLE acceleration.
+        """
+        if colorkey is not None:
+            colorkey = tuple(pg.Color(colorkey))
+        convert = can_convert()
+
+        def slice_sheet() -> list[pg.Surface]:
+            atlas = self.get_atlas()
+            mirrored = atlas.mirrored(filepath, frame_width) if atlas and flip else None
+            sheet = mirrored or self.image(filepath)
+            if sheet.get_parent() and (mirrored or not flip):
+                return self.slice_view(sheet, frame_width, colorkey)
+
+            frames = []
+            for n in range(sheet.get_width() // frame_width):
+                frame = pg.Surface((frame_width, sheet.get_height()))
+                frame.blit(sheet, (-n * frame_width, 0))
+                if flip:
+                    frame = pg.transform.flip(frame, True, False)
+                if convert:
+                    frame = frame.convert()
+                if colorkey is not None:
+                    frame.set_colorkey(colorkey, pg.RLEACCEL)
+                frames.append(frame)
+            return frames
+
+        return self.fetch(('frames', filepath, frame_width, flip, colorkey, convert), slice_sheet)
+
+    def get_atlas(self) -> Atlas | None:
+        """The packed atlases, loaded on first use and
+        converted as soon as there is a display
+        """
+        with self.lock:
+            if self.atlas is None:
+                self.atlas = Atlas.load() or False
+            if self.atlas and not self.atlas.converted and can_convert():
+                self.atlas.convert()
+            return self.atlas or None
+
+    def image(self, filepath: str, colorkey: pg.Color | None = None, flip: bool = False,
+              convert: bool = False) -> pg.Surface:
+        """Load an image from [filepath]. Variants
+        (colorkeyed, flipped, converted) are derived
+        from the cached base image, so each file is
+        decoded at most once while it stays cached.
+        A colorkey is applied with RLE acceleration,
+        so copy() and re-key a variant before drawing
+        onto it. [convert] is ignored while there is
+        no display to convert to.
+        """
+        if colorkey is not None:
+            colorkey = tuple(pg.Color(colorkey))
+        convert = convert and can_convert()
+
+        if colorkey is None and not flip and not convert:
+            return self.fetch(('image', filepath, None, False, False),
+                              lambda: self.base_image(filepath))
+
+        def derive() -> pg.Surface:
+            base = self.image(filepath)
+            view = bool(base.get_parent())  # Shares its atlas's pixels
+            surface = base
+            if flip:
+                surface = pg.transform.flip(surface, True, False)
+                view = False
+            if convert and not (view and self.atlas.converted):
+                if surface.get_flags() & pg.SRCALPHA:
+                    surface = surface.convert_alpha()
+                else:
+                    surface = surface.convert()
+                view = False
+            if surface is base:
+                surface = base.subsurface(base.get_rect()) if view else base.copy()
+            if colorkey is not None:
+                # RLE would give a view its own encoded copy of the pixels
+                surface.set_colorkey(colorkey, 0 if view else pg.RLEACCEL)
+            return surface
+
+        return self.fetch(('image', filepath, colorkey, flip, convert), derive)
+
+    def set_budget(self, budget: int):
+        with self.lock:
+            self.budget = budget
+            self.evict()
+
+    def slice_view(self, sheet: pg.Surface, frame_width: int,
+                   colorkey: tuple | None) -> list[pg.Surface]:
+        """Frames of an atlas [sheet] as views into
+        it, without RLE so they keep sharing pixels
+        """
+        frames = []
+        for n in range(sheet.get_width() // frame_width):
+            frame = sheet.subsurface((n * frame_width, 0, frame_width, sheet.get_height()))
+            if colorkey is not None:
+                frame.set_colorkey(colorkey)
+            frames.append(frame)
+        return frames
+
+    def stats(self) -> dict:
+        return dict(budget=self.budget, entries=len(self.entries), hits=self.hits,
+                    misses=self.misses, size=self.size)
+
+
+asset_cache = AssetCache()
@@ -0,0 +1,170 @@
+"""Pack the sprite, doodad and menu images into
+one atlas image per directory.
+
+    python atlas.py
+
+writes lib/atlas/<directory>.png and a manifest,
+lib/atlas/atlas.json, mapping each source file to
+its rectangle in an atlas and the hash of its
+contents. Unit sheets facing left
+also get a mirrored copy (each frame flipped in
+place) so right-facing frames need no flipping at
+load. Re-run it after changing any packed image;
+without a manifest, or for any image edited since
+it was written, images load from loose files.
+"""
+import json
+import os
+
+import pygame as pg
+
+from pack import file_digest, get_asset_pack, is_unchanged, pack_key
+from palette import BLACK
+
+
+ATLAS_DIR = os.path.join('lib', 'atlas')
+ATLAS_WIDTH = 512      # Pixels; sheets are packed in rows up to this width
+MANIFEST_FILE = os.path.join(ATLAS_DIR, 'atlas.json')
+MIRRORED_SUFFIX = '_left.png'
+PACKED_DIRS = ['unit', 'doodad', 'menu']
+UNIT_FRAME_WIDTH = 16  # Frame width of the mirrored unit sheets
+
+
+def mirror_frames(sheet: pg.Surface, frame_width: int) -> pg.Surface:
+    """[sheet] with each frame flipped in place,
+    keeping the frames in order
+    """
+    mirrored = pg.Surface(sheet.get_size())
+    for x in range(0, sheet.get_width(), frame_width):
+        frame = sheet.subsurface((x, 0, frame_width, sheet.get_height()))
+        mirrored.blit(pg.transform.flip(frame, True, False), (x, 0))
+    return mirrored
+
+
+def pack(sizes: list[tuple[int]], width: int) -> tuple[list[pg.Rect], int]:
+    """Place rectangles of [sizes] in shelves, tallest
+    first. Returns their rects, in the same order as
+    [sizes], and the height used.
+    """
+    rects = [None] * len(sizes)
+    x = y = shelf_h = 0
+    for n in sorted(range(len(sizes)), key=lambda n: (-sizes[n][1], -sizes[n][0])):
+        w, h = sizes[n]
+        if x + w > width:
+            x, y, shelf_h = 0, y + shelf_h, 0
+        rects[n] = pg.Rect(x, y, w, h)
+        x += w
+        shelf_h = max(shelf_h, h)
+
+    return rects, y + shelf_h
+
+
+class Atlas():
+    """Packed images loaded from the manifest.
+    Images are handed out as subsurfaces of their
+    atlas, so their pixels are never copied. Images
+    edited since the manifest was written are left
+    to load from their files.
+    """
+    def __init__(self, manifest: dict):
+        self.converted = False  # Atlases are in the display format
+        self.current   = {}     # file: whether it is unchanged, once checked
+        self.entries   = manifest['images']  # file: {'atlas', 'digest', 'rect', ['mirrored']}
+        self.surfaces  = {}     # atlas name: surface
+
+        asset_pack = get_asset_pack()
+        for name, filename in manifest['atlases'].items():
+            filepath = os.path.join(ATLAS_DIR, filename)
+            self.surfaces[name] = (asset_pack and asset_pack.image(filepath)) or pg.image.load(filepath)
+
+    def convert(self):
+        """Convert every atlas once a display mode is
+        set. Views taken before then keep the old
+        pixels.
+        """
+        for name, surface in self.surfaces.items():
+            self.surfaces[name] = surface.convert()
+        self.converted = True
+
+    def entry(self, filepath: str) -> dict | None:
+        """Manifest entry of [filepath], unless the
+        file has changed since the atlases were built
+        """
+        key = pack_key(filepath)
+        entry = self.entries.get(key)
+        if not entry:
+            return None
+
+        if key not in self.current:
+            self.current[key] = is_unchanged(filepath, entry.get('digest'))
+        return entry if self.current[key] else None
+
+    def image(self, filepath: str) -> pg.Surface | None:
+        entry = self.entry(filepath)
+        if not entry:
+            return None
+        return self.surfaces[entry['atlas']].subsurface(entry['rect'])
+
+    @classmethod
+    def load(cls):
+        """The packed atlases, or None if they have
+        not been built
+        """
+        asset_pack = get_asset_pack()
+        manifest = asset_pack and asset_pack.document(MANIFEST_FILE)
+        if manifest:
+            return cls(manifest)
+
+        if not os.path.exists(MANIFEST_FILE):
+            return None
+        with open(MANIFEST_FILE) as f:
+            return cls(json.load(f))
+
+    def mirrored(self, filepath: str, frame_width: int) -> pg.Surface | None:
+        """[filepath]'s sheet with every frame of
+        [frame_width] flipped, if it was packed
+        """
+        entry = self.entry(filepath)
+        if not entry or 'mirrored' not in entry or frame_width != UNIT_FRAME_WIDTH:
+            return None
+        return self.surfaces[entry['atlas']].subsurface(entry['mirrored'])
+
+
+def build_atlases():
+    os.makedirs(ATLAS_DIR, exist_ok=True)
+    manifest = dict(atlases={}, images={})
+
+    for directory in PACKED_DIRS:
+        sheets = []  # (file, which, surface)
+        for filename in sorted(os.listdir(os.path.join('lib', directory))):
+            if not filename.endswith('.png'):
+                continue
+            filepath = os.path.join('lib', directory, filename)
+            sheet = pg.image.load(filepath)
+            sheets.append((filepath, 'rect', sheet))
+            if directory == 'unit' and filename.endswith(MIRRORED_SUFFIX):
+                sheets.append((filepath, 'mirrored', mirror_frames(sheet, UNIT_FRAME_WIDTH)))
+
+        rects, height = pack([s.get_size() for _, _, s in sheets], ATLAS_WIDTH)
+
+        # Opaque, like the frame surfaces sheets used to be sliced into
+        atlas = pg.Surface((ATLAS_WIDTH, height))
+        atlas.fill(BLACK)
+        for (filepath, which, sheet), rect in zip(sheets, rects):
+            atlas.blit(sheet, rect)
+            entry = manifest['images'].setdefault(pack_key(filepath),
+                                                  dict(atlas=directory, digest=file_digest(filepath)))
+            entry[which] = list(rect)
+
+        pg.image.save(atlas, os.path.join(ATLAS_DIR, f'{directory}.png'))
+        manifest['atlases'][directory] = f'{directory}.png'
+        print(f'{directory}: {len(sheets)} images in {ATLAS_WIDTH}x{height}')
+
+    images = ',\n'.join(f'        {json.dumps(k)}: {json.dumps(v)}' for k, v in manifest['images'].items())
+    with open(MANIFEST_FILE, 'w') as f:
+        f.write(f'{{\n    "atlases": {json.dumps(manifest["atlases"])},\n'
+                f'    "images": {{\n{images}\n    }}\n}}\n')
+
+
+if __name__ == '__main__':
+    build_atlases()
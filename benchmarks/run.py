@@ -0,0 +1,215 @@
+"""Time the hot paths headlessly and compare them
+against a baseline from this machine.
+
+    python benchmarks/run.py            # Run and compare with the baseline
+    python benchmarks/run.py --save     # Run and overwrite the baseline
+    python benchmarks/run.py area_load  # Run only the named benchmarks
+
+The baseline lives in cache/ and is written by the
+first run, since timings only compare on the same
+machine. Each benchmark reports the median and
+fastest of [repeat] samples; calls too short to
+time reliably are repeated within a sample until it
+takes MIN_SAMPLE_MS. Regressions are judged on the
+median, allowing for the run-to-run spread of both
+runs. Allocations are Python memory blocks
+(tracemalloc) allocated by one run and still alive
+when it returns, plus its peak traced memory; SDL
+pixel buffers are not seen.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from statistics import quantiles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(ROOT, 'cache', 'benchmark_baseline.json')
+MIN_SAMPLE_MS = 5  # Shorter calls are repeated within one sample
+TOLERANCE = 0.25  # Default allowed slowdown over the baseline, on top of the noise
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame as pg
+
+from animation import clear_animation_sets
+from area import Area
+from assets import asset_cache
+from dialog import Dialog
+from game import Game
+from menu import Overworld_Sidebar
+
+
+LONG_PAGE = 'Technology is incredible! You can now store and recall items and POKéMON as data via PC!'
+
+
+class Benchmark():
+    """[run] is the timed call. [setup], if given,
+    is called untimed before every run, so each
+    sample is a single run.
+    """
+    def __init__(self, name: str, run, setup=None, repeat: int = 20):
+        self.name   = name
+        self.repeat = repeat
+        self.run    = run
+        self.setup  = setup
+
+    def calibrate(self) -> int:
+        """Runs per sample needed to take at least
+        MIN_SAMPLE_MS
+        """
+        if self.setup:
+            return 1
+
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                self.run()
+            if (time.perf_counter() - start) * 1000 >= MIN_SAMPLE_MS:
+                return number
+            number *= 2
+
+    def measure(self) -> dict:
+        number = self.calibrate()
+        times = []  # Seconds per run, one per sample
+        for _ in range(self.repeat):
+            if self.setup:
+                self.setup()
+            start = time.perf_counter()
+            for _ in range(number):
+                self.run()
+            times.append((time.perf_counter() - start) / number)
+        q1, middle, q3 = quantiles(times, n=4)
+
+        if self.setup:
+            self.setup()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        self.run()
+        after = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        blocks = sum(s.count_diff for s in after.compare_to(before, 'filename') if s.count_diff > 0)
+
+        return dict(median_ms=round(middle * 1000, 4),
+                    min_ms=round(min(times) * 1000, 4),
+                    spread=round((q3 - q1) / middle, 3),  # Interquartile range over the median
+                    blocks=blocks,
+                    peak_kib=round(peak / 1024, 1))
+
+
+def cold_caches():
+    """Forget every decoded image, atlas and
+    animation set, as at startup
+    """
+    asset_cache.clear()
+    clear_animation_sets()
+
+
+def walking(game: Game):
+    """One second of ticks, each rendered, with the
+    trainer walking back and forth along a row and
+    turning at walls.
+    """
+    held = [pg.K_d]
+
+    def run():
+        for _ in range(game.tick_rate):
+            game.update()
+            game.update_screen()
+            if game.trainer.action == 'stand':
+                game.controller.handle_keyup(held[0])
+                held[0] = pg.K_a if held[0] == pg.K_d else pg.K_d
+                game.controller.handle_keydown(held[0])
+
+    game.controller.handle_keydown(held[0])
+    return run
+
+
+def create_benchmarks() -> list[Benchmark]:
+    game = Game(headless=True)
+    game.reset_to_initial_state()
+    game.state = 'loop'
+    font = game.font
+    dialog = Dialog([LONG_PAGE], font)
+
+    def transition():
+        game.create_transition(new_area='Heros house L1')
+        for _ in game.transition:
+            pass
+
+    return [
+        Benchmark('area_load', lambda: Area('Pallet Town'), setup=cold_caches, repeat=10),
+        Benchmark('area_load_cached', lambda: Area('Pallet Town'), repeat=10),
+        Benchmark('create_transition', transition, repeat=10),
+        Benchmark('walking_second', walking(game), repeat=30),
+        Benchmark('dialog_long_page', lambda: dialog.render_dialog_text(LONG_PAGE), repeat=200),
+        Benchmark('overworld_sidebar', lambda: Overworld_Sidebar(font), repeat=50),
+    ]
+
+
+def compare(results: dict, baseline: dict, tolerance: float = TOLERANCE) -> list[str]:
+    """Benchmarks whose median is slower than the
+    baseline's by more than [tolerance] plus the
+    spread of both runs.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or 'spread' not in base:
+            continue
+        allowed = tolerance + result['spread'] + base['spread']
+        if result['median_ms'] > base['median_ms'] * (1 + allowed):
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Py-k-mon benchmarks')
+    parser.add_argument('names', nargs='*', help='benchmarks to run (default: all)')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='allowed slowdown before failing, as a fraction (default: %(default)s)')
+    parser.add_argument('--save', action='store_true', help=f'write results to {BASELINE_FILE}')
+    args = parser.parse_args()
+
+    pg.init()
+    benchmarks = [b for b in create_benchmarks() if not args.names or b.name in args.names]
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+
+    results = {}
+    print(f'{"benchmark":<20}{"median ms":>11}{"min ms":>10}{"blocks":>8}{"peak KiB":>10}{"vs base":>9}')
+    for benchmark in benchmarks:
+        result = results[benchmark.name] = benchmark.measure()
+        change = ''
+        if benchmark.name in baseline:
+            change = f'{result["median_ms"] / baseline[benchmark.name]["median_ms"] - 1:+.0%}'
+        print(f'{benchmark.name:<20}{result["median_ms"]:>11.3f}{result["min_ms"]:>10.3f}'
+              f'{result["blocks"]:>8}{result["peak_kib"]:>10.1f}{change:>9}')
+
+    if args.save or not baseline:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(baseline | results, f, indent=4)
+            f.write('\n')
+        if not args.save:
+            print(f'No baseline yet; saved this run to {BASELINE_FILE}')
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f'Slower than baseline by over {args.tolerance:.0%}: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,94 +1,210 @@
+from typing import NamedTuple
+
 import pygame as pg
 
 
-class Button():
-    def __init__(self, name: str, binding: int, dpad: bool=False):
-        self.binding = binding
-        self.dpad    = dpad
-        self.name    = name
+BUTTON_NAMES = ['UP', 'DOWN', 'LEFT', 'RIGHT', 'A', 'B', 'START']  # D-pad first
+BUTTON_BITS = {name: 1 << n for n, name in enumerate(BUTTON_NAMES)}
+DPAD_MASK = 0b1111
+STYLES = {  # style: {button name: keys}
+    'wasd': {'UP': [pg.K_w], 'DOWN': [pg.K_s], 'LEFT': [pg.K_a], 'RIGHT': [pg.K_d],
+             'A': [pg.K_u], 'B': [pg.K_h], 'START': [pg.K_SPACE]},
+    'arrows': {'UP': [pg.K_UP], 'DOWN': [pg.K_DOWN], 'LEFT': [pg.K_LEFT], 'RIGHT': [pg.K_RIGHT],
+               'A': [pg.K_z], 'B': [pg.K_x], 'START': [pg.K_RETURN]},
+}
+
+
+def first_direction(mask: int) -> int|None:
+    """The first d-pad direction set in [mask], in
+    UP, DOWN, LEFT, RIGHT order
+    """
+    dpad = mask & DPAD_MASK
+    if not dpad:
+        return None
+    return (dpad & -dpad).bit_length() - 1
+
+
+class InputSnapshot(NamedTuple):
+    """Button state for one tick, read by
+    everything that handles input that tick.
+
+    [events] holds each key transition since the
+    previous snapshot as (ms, button name, is down),
+    timed by pg.time.get_ticks() when drained.
+    """
+    down: int = 0      # Bitmask of held buttons
+    pressed: int = 0   # Bitmask of buttons pressed since the last snapshot
+    released: int = 0  # Bitmask of buttons released since the last snapshot
+    events: tuple = ()
+
+    @property
+    def dpad(self) -> int|None:
+        return first_direction(self.down)
+
+    def is_down(self, name: str) -> bool:
+        return bool(self.down & BUTTON_BITS[name])
+
+    def last_pressed(self) -> str|None:
+        """Of the buttons pressed since the last
+        snapshot, the last in button order
+        """
+        if not self.pressed:
+            return None
+        return BUTTON_NAMES[self.pressed.bit_length() - 1]
+
+    def was_pressed(self, name: str) -> bool:
+        return bool(self.pressed & BUTTON_BITS[name])
 
-        self.flag    = False  # Fires once on press
-        self.is_down = False
+
+NO_INPUT = InputSnapshot()
+
+
+class Button():
+    """One GBA button. Its state lives in its
+    controller's bitmasks, at bit [index].
+    """
+    def __init__(self, controller, name: str, index: int, keys: list[int]):
+        self.bit        = 1 << index
+        self.controller = controller
+        self.dpad       = bool(self.bit & DPAD_MASK)
+        self.index      = index
+        self.keys       = keys
+        self.name       = name
+
+    @property
+    def flag(self) -> bool:
+        """Fires once on press"""
+        return bool(self.controller.flags & self.bit)
+
+    @property
+    def is_down(self) -> bool:
+        return bool(self.controller.down & self.bit)
 
     def as_int(self) -> int:
         if not self.dpad:
             raise RuntimeError(f'Button "{self.name}" cannot be interpreted as an int')
-        return ['UP', 'DOWN', 'LEFT', 'RIGHT'].index(self.name)
+        return self.index
 
     def press(self):
-        self.flag = True
-        self.is_down = True
+        self.controller.down |= self.bit
+        self.controller.flags |= self.bit
 
     def release(self):
-        self.flag = False
-        self.is_down = False
+        """A press earlier in the same tick still
+        counts; the flag clears on update.
+        """
+        self.controller.down &= ~self.bit
+        self.controller.releases |= self.bit
 
     def update(self):
-        self.flag = False
+        self.controller.flags &= ~self.bit
 
 
 class Controller():
-    def __init__(self, style: str):
-        self.style = style  # WASD, arrows
-
-        self.buttons = []
-        self.set_buttons_from_style()
+    """GBA buttons driven by the keyboard.
+
+    [style] picks a preset from STYLES; [bindings]
+    ({button name: keys}) overrides any of its
+    buttons. A button can be bound to several keys
+    and stays down until all of them are released.
+    """
+    def __init__(self, style: str, bindings: dict[str, list[int]] = None):
+        if style not in STYLES:
+            raise RuntimeError(f'Unknown controller style "{style}"')
+        self.style = style  # wasd, arrows
+
+        self.button_lists = {}     # bitmask: buttons with those bits set, in button order
+        self.buttons      = []
+        self.by_key       = {}     # key: button
+        self.by_name      = {}     # name: button
+        self.down         = 0      # Bitmask of held buttons
+        self.flags        = 0      # Bitmask of buttons pressed since the last update
+        self.held_keys    = set()  # Bound keys currently held
+        self.last         = NO_INPUT
+        self.releases     = 0      # Bitmask of buttons released since the last update
+        self.transitions  = []     # (ms, button name, is down) since the last update
+
+        self.set_buttons_from_style(bindings or {})
 
     def button(self, name: str) -> Button:
-        return next(b for b in self.buttons if b.name == name)
+        return self.by_name[name]
+
+    def buttons_in(self, mask: int) -> list[Button]:
+        """Buttons set in [mask]. Lists are cached
+        per mask and must not be modified.
+        """
+        try:
+            return self.button_lists[mask]
+        except KeyError:
+            buttons = self.button_lists[mask] = [b for b in self.buttons if mask & b.bit]
+            return buttons
 
     def get_dpad(self) -> list[Button]:
-        return [b for b in self.buttons if b.dpad]
+        return self.buttons_in(DPAD_MASK)
 
     def get_dpad_input(self) -> int|None:
-        try:
-            return next(b for b in self.get_dpad() if b.is_down).as_int()
-        except StopIteration:
-            return None
+        return first_direction(self.down)
 
     def get_flags(self) -> list[Button]:
-        return [b for b in self.buttons if b.flag]
+        return self.buttons_in(self.flags)
 
     def get_pressed(self) -> list[Button]:
-        return [b for b in self.buttons if b.is_down]
+        return self.buttons_in(self.down)
 
-    def handle_keydown(self, key: int):
-        try:
-            button = next(b for b in self.buttons if b.binding == key)
+    def handle_keydown(self, key: int, timestamp: int = 0):
+        button = self.by_key.get(key)
+        if button:
+            self.held_keys.add(key)
             button.press()
-        except StopIteration:
-            pass
+            self.transitions.append((timestamp, button.name, True))
 
-    def handle_keyup(self, key: int):
-        try:
-            button = next(b for b in self.buttons if b.binding == key)
-            button.release()
-        except StopIteration:
-            pass
+    def handle_keyup(self, key: int, timestamp: int = 0):
+        button = self.by_key.get(key)
+        if button:
+            self.held_keys.discard(key)
+            if not any(k in self.held_keys for k in button.keys):
+                button.release()
+                self.transitions.append((timestamp, button.name, False))
 
     def poll(self):
         """Manually poll controller keys"""
-        for button in self.buttons:
-            if pg.key.get_pressed()[button.binding]:
-                button.is_down = True
+        pressed = pg.key.get_pressed()
+        for key, button in self.by_key.items():
+            if pressed[key]:
+                self.held_keys.add(key)
+                self.down |= button.bit
 
     def reset(self):
-        for btn in self.buttons:
-            btn.release()
-
-    def set_buttons_from_style(self):
-        match self.style:
-            case 'wasd':
-                buttons = ['UP', 'DOWN', 'LEFT', 'RIGHT']
-                bindings = [pg.K_w, pg.K_s, pg.K_a, pg.K_d]
-                for n in range(len(buttons)):
-                    self.buttons.append(Button(name=buttons[n], binding=bindings[n], dpad=True))
-
-                buttons = ['A', 'B', 'START']
-                bindings = [pg.K_u, pg.K_h, pg.K_SPACE]
-                for n in range(len(buttons)):
-                    self.buttons.append(Button(name=buttons[n], binding=bindings[n]))
+        self.down = 0
+        self.flags = 0
+        self.held_keys.clear()
+        self.releases = 0
+        self.transitions.clear()
+        self.last = NO_INPUT
+
+    def set_buttons_from_style(self, bindings: dict[str, list[int]]):
+        keys_by_name = STYLES[self.style] | bindings
+        for index, name in enumerate(BUTTON_NAMES):
+            button = Button(self, name, index, list(keys_by_name[name]))
+            self.buttons.append(button)
+            self.by_name[name] = button
+            for key in button.keys:
+                self.by_key[key] = button
+
+    def snapshot(self) -> InputSnapshot:
+        """Current state, frozen. While nothing
+        changes, the previous snapshot is reused.
+        """
+        if self.flags or self.releases or self.transitions or self.down != self.last.down:
+            self.last = InputSnapshot(self.down, self.flags, self.releases, tuple(self.transitions))
+        elif self.last.pressed or self.last.released or self.last.events:
+            self.last = InputSnapshot(self.down)
+        return self.last
 
     def update(self):
-        for button in self.buttons:
-            button.update()
+        """Clear presses, releases and transitions
+        once a tick has consumed them
+        """
+        self.flags = 0
+        self.releases = 0
+        self.transitions.clear()
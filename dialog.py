@@ -1,7 +1,6 @@
-import os
-
 import pygame as pg
 
+from controller import InputSnapshot
 from helpers import colorkeyed_surface, colorkeyed_surface_from_file
 from palette import TRANSPARENT
 
@@ -10,11 +9,11 @@ class Dialog():
     def __init__(self, pages, font):
         self.font            = font
         self.letter_h        = 12
-        self.letter_w        = 6
         self.pages           = pages
 
         self.box             = None
         self.box_offset      = (5, 106)
+        self.changed         = False  # Image was drawn onto since last displayed
         self.chars_offset    = (13, 10)
         self.chars_per_line  = 29
         self.continue_button = None
@@ -34,6 +33,7 @@ class Dialog():
                 self.letter_objs = self.render_dialog_text(self.pages[self.page])
                 self.image.fill(TRANSPARENT)
                 self.image.blit(self.box, (0, 0))
+                self.changed = True
 
             self.frame_counter += 1
             if self.frame_counter == self.frame_max:
@@ -50,12 +50,28 @@ class Dialog():
             letter = self.letter_objs[self.letter]
             self.image.blit(letter['surface'],
                             (self.chars_offset[0] + letter['x'], letter['y'] + self.chars_offset[1]))
+            self.changed = True
         except IndexError:
             pass
 
     def display(self):
         self.state = 'typewriter'
 
+    def get_action_from_input(self, inputs: InputSnapshot) -> str:
+        """Game method that A calls for, if it was
+        just pressed
+        """
+        if not inputs.was_pressed('A'):
+            return ''
+
+        match self.state:
+            case 'next':
+                return 'next_page'
+            case 'exit':
+                return 'exit_dialog'
+            case _:
+                return 'skip_dialog'
+
     def load_resources(self):
         self.box = colorkeyed_surface_from_file('lib', 'menu', 'dialog.png')
         self.continue_button = colorkeyed_surface_from_file('lib', 'menu', 'continue_button.png')
@@ -76,23 +92,11 @@ class Dialog():
             if words:
                 line_length_exceeded = len(' '.join(line0 + [words[0]])) > self.chars_per_line
 
+        # Letter surfaces are the font's shared glyphs
         letters = []
         for l, line in enumerate([line0, words]):
-            current_pos = 0
-
-            for char in ' '.join(line):
-                letter = {'surface': colorkeyed_surface((self.letter_w, self.letter_h))}
-
-                for n, row in enumerate(self.font.text_rows):
-                    if char in row:
-                        offset = -n * self.letter_h
-                        letter['surface'].blit(self.font.image, (row.index(char) * -self.letter_w, offset))
-                        letter['x'] = current_pos * (self.letter_w + 1)
-                        letter['y'] = l * self.letter_h
-                        letters.append(letter)
-                        break
-
-                current_pos += 1
+            for glyph, x in self.font.layout(' '.join(line)):
+                letters.append({'surface': glyph, 'x': x, 'y': l * self.letter_h})
 
         return letters
 
@@ -117,6 +121,7 @@ class Dialog():
             self.image.blit(self.continue_button,
                 (self.letter_objs[-1]['x'] + self.chars_offset[0] + 12,
                  self.letter_objs[-1]['y'] + self.chars_offset[1]))
+            self.changed = True
 
         self.animate()
 
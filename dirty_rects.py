@@ -0,0 +1,61 @@
+import pygame as pg
+
+
+def blit_rect(blit: tuple) -> pg.Rect:
+    """Screen area covered by a (surface, dest, area) blit"""
+    surface, dest, area = blit
+    size = pg.Rect(area).size if area else surface.get_size()
+    return pg.Rect((int(dest[0]), int(dest[1])), size)
+
+
+def blit_signature(blit: tuple) -> tuple:
+    surface, dest, area = blit
+    return surface, (int(dest[0]), int(dest[1])), tuple(area) if area else None
+
+
+class DirtyRects():
+    """Works out which parts of the screen changed
+    between two frames.
+
+    Each frame is described as a list of
+    (surface, dest, area) blits. A region is dirty
+    when a blit covering it appeared, disappeared
+    or moved since the previous frame, or when a
+    surface drawn there had its contents changed.
+    """
+    def __init__(self, bounds: pg.Rect):
+        self.bounds      = pg.Rect(bounds)
+
+        self.full_redraw = True   # Next frame redraws everything
+        self.previous    = set()  # Blit signatures of the last frame
+
+    def collect(self, blits: list[tuple], changed: set[pg.Surface]) -> list[pg.Rect]:
+        """Dirty regions for [blits], clipped to the
+        screen and merged where they overlap. Surfaces
+        in [changed] are dirty wherever they are drawn.
+        """
+        signatures = {blit_signature(b) for b in blits}
+        stale = signatures ^ self.previous
+        self.previous = signatures
+
+        if self.full_redraw:
+            self.full_redraw = False
+            return [self.bounds.copy()]
+
+        rects = [blit_rect(s) for s in stale]
+        rects.extend(blit_rect(b) for b in blits if b[0] in changed)
+        return self.merge([r.clip(self.bounds) for r in rects if r.colliderect(self.bounds)])
+
+    def mark_all(self):
+        self.full_redraw = True
+
+    def merge(self, rects: list[pg.Rect]) -> list[pg.Rect]:
+        merged = []
+        for rect in rects:
+            n = rect.collidelist(merged)
+            while n != -1:
+                rect.union_ip(merged.pop(n))
+                n = rect.collidelist(merged)
+            merged.append(rect)
+
+        return merged
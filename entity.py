@@ -1,28 +1,30 @@
-import os
-
 import pygame as pg
 from pygame.math import Vector2
 
-from palette import TRANSPARENT
 
+class Entity():
+    """Slotted, since areas hold many of these;
+    frames come from an AnimationSet shared by
+    every entity of the same type.
+    """
+    __slots__ = ('action', 'animations', 'facing', 'formatted_name', 'frame', 'frame_counter',
+                 'frame_delay', 'grid_location', 'image', 'previous_location', 'rect')
+
+    grid_offset_y = 0
 
-class Entity(pg.sprite.Sprite):
     def __init__(self, location: Vector2, entity_name: str):
-        pg.sprite.Sprite.__init__(self)
-
-        self.grid_location  = Vector2(location)
-        self.formatted_name = entity_name.lower().replace(' ', '_')
-
-        self.action         = 'stand'
-        self.actions        = ['stand']
-        self.facing         = 1  # Up, Down, Left, Right
-        self.frame          = 0
-        self.frame_counter  = 0
-        self.frame_delay    = 16
-        self.grid_offset_y  = 0
-        self.image          = None
-        self.images         = {}
-        self.rect           = None
+        self.grid_location     = Vector2(location)
+        self.formatted_name    = entity_name.lower().replace(' ', '_')
+
+        self.action            = 'stand'
+        self.animations        = None  # AnimationSet, set by subclasses
+        self.facing            = 1  # Up, Down, Left, Right
+        self.frame             = 0
+        self.frame_counter     = 0
+        self.frame_delay       = 16
+        self.image             = None
+        self.previous_location = Vector2(location)  # grid_location as of the previous tick
+        self.rect              = None
 
     def advance_animation(self):
         self.frame_counter += 1
@@ -30,18 +32,19 @@ class Entity(pg.sprite.Sprite):
             self.frame_counter = 0
             self.frame += 1
 
-            if self.frame == len(self.images[self.action][self.facing]):
+            if self.frame == len(self.animations.frames[self.action][self.facing]):
                 self.frame = 0
 
-    def center(self) -> tuple[float]:
-        return self.grid_location.x * 16 + self.rect.width  / 2, self.grid_location.y * 16 - self.rect.height / 2
+    def center(self, alpha: float = 1.0) -> tuple[float]:
+        location = self.location_at(alpha)
+        return location.x * 16 + self.rect.width  / 2, location.y * 16 - self.rect.height / 2
 
-    def coords(self) -> tuple[float]:
-        return (self.grid_location.x * 16, self.grid_location.y * 16)
+    def coords(self, alpha: float = 1.0) -> tuple[float]:
+        location = self.location_at(alpha)
+        return (location.x * 16, location.y * 16)
 
     def draw(self):
-        self.image = self.images[self.action][self.facing][self.frame]
-        self.image.set_colorkey(TRANSPARENT)
+        self.image = self.animations.frames[self.action][self.facing][self.frame]
         self.rect = self.image.get_rect(topleft=(self.grid_location.x, self.grid_location.y + self.grid_offset_y))
 
         self.advance_animation()
@@ -55,19 +58,17 @@ class Entity(pg.sprite.Sprite):
 
         return False
 
-    def load_sheet(self, entity_type: str, sheet_name: str, sheet_width: int,
-                   flip: bool) -> list[pg.Surface]:
-        frames = []
-        sheet = pg.image.load(os.path.join('lib', entity_type, sheet_name))
-
-        for n in range(sheet.get_width() // sheet_width):
-            frame = pg.Surface((sheet_width, sheet.get_height()))
-            frame.blit(sheet, (-n * sheet_width, 0))
-            if flip:
-                frame = pg.transform.flip(frame, True, False)
-            frames.append(frame)
+    def location_at(self, alpha: float) -> Vector2:
+        """grid_location interpolated between the
+        previous tick (0.0) and the current one (1.0)
+        """
+        if alpha == 1.0:
+            return self.grid_location
+        return self.previous_location.lerp(self.grid_location, alpha)
 
-        return frames
+    def map_rect(self, alpha: float = 1.0) -> pg.Rect:
+        """Area the current image covers, in map pixels"""
+        return self.image.get_rect(topleft=self.coords(alpha))
 
     def turn(self, direction: str|int):
         """Set facing direction, either by
@@ -88,5 +89,6 @@ class Entity(pg.sprite.Sprite):
                 self.facing = 3
 
     def update(self):
+        self.previous_location.update(self.grid_location)
         self.advance_animation()
         self.draw()
@@ -3,26 +3,60 @@ from string import ascii_lowercase, ascii_uppercase
 
 import pygame as pg
 
+from assets import asset_cache
 from helpers import colorkeyed_surface
+from palette import TRANSPARENT
+
+
+RENDER_CACHE_LIMIT = 256  # Rendered strings kept by Font.render_text
 
 
 class Font():
     def __init__(self):
-        self.image = pg.image.load(os.path.join('lib', 'menu', 'pk_font.png'))
+        self.glyphs    = {}  # char: subsurface of self.image
+        self.image     = asset_cache.image(os.path.join('lib', 'menu', 'pk_font.png'), convert=True)
+        self.letter_h  = 12
+        self.letter_w  = 6
+        self.rendered  = {}  # text: surface
         self.text_rows = [ascii_uppercase, ascii_lowercase,
                           '0123456789,.#!?#\'""-/##é ']
 
-    def render_text(self, text: str) -> pg.Surface:
-        letter_w, letter_h = 6, 12
+        self.slice_glyphs()
+
+    def layout(self, text: str) -> list[tuple[pg.Surface, int]]:
+        """Glyphs for [text] with their x offsets.
+        Characters missing from the font leave a gap.
+        """
         text = text.replace(':', '-')
-        surface = colorkeyed_surface(((letter_w + 1) * len(text), letter_h), fill=True)
+        return [(self.glyphs[char], pos * (self.letter_w + 1))
+                for pos, char in enumerate(text) if char in self.glyphs]
 
-        for pos, char in enumerate(text):
-            letter = pg.Surface((letter_w, letter_h))
-            for n, row in enumerate(self.text_rows):
-                if char in row:
-                    offset = -n * letter_h
-                    letter.blit(self.image, (row.index(char) * -letter_w, offset))
-                    surface.blit(letter, (pos * (letter_w + 1), 0))
+    def render_text(self, text: str) -> pg.Surface:
+        """Render [text] onto one surface. Results are
+        cached per string and must not be modified.
+        """
+        try:
+            return self.rendered[text]
+        except KeyError:
+            pass
+
+        surface = colorkeyed_surface(((self.letter_w + 1) * len(text), self.letter_h), fill=True)
+        surface.blits([(glyph, (x, 0)) for glyph, x in self.layout(text)], doreturn=False)
 
+        if len(self.rendered) == RENDER_CACHE_LIMIT:
+            self.rendered.clear()
+        self.rendered[text] = surface
         return surface
+
+    def slice_glyphs(self):
+        """Index each character's cell of the font
+        sheet once. Where a character appears more
+        than once, the first cell wins.
+        """
+        for n, row in enumerate(self.text_rows):
+            for col, char in enumerate(row):
+                if char not in self.glyphs:
+                    glyph = self.image.subsurface(
+                        (col * self.letter_w, n * self.letter_h, self.letter_w, self.letter_h))
+                    glyph.set_colorkey(TRANSPARENT)
+                    self.glyphs[char] = glyph
@@ -4,39 +4,74 @@ from math import floor
 import pygame as pg
 
 from area import Area
+from area_pool import AreaPool
 from palette import BLACK, GRAY, TRANSPARENT
-from controller import Controller
+from controller import Controller, NO_INPUT
 from dialog import Dialog
-from doodad import Doodad
+from dirty_rects import DirtyRects
 from font import Font
 from helpers import colorkeyed_surface_from_file
+from map_registry import get_map_registry
 from menu import Overworld_Sidebar
+from presenter import Presenter
+from profiler import FrameProfiler
 from trainer import Trainer
+from replay import InputScript
+from transitions import TRANSITIONS
+from world import World
 
 
+QUEUED_EVENTS = [pg.QUIT, pg.KEYDOWN, pg.KEYUP, pg.VIDEORESIZE, pg.WINDOWEXPOSED]  # Others are dropped
+INPUT_STATES = ['loop', 'menu']  # States in which keys reach the controller
+
 class Game():
-    def __init__(self):
+    def __init__(self, headless: bool = False, input_script: InputScript = None, controls: str = 'wasd'):
+        """[headless] runs one tick per frame with no
+        frame cap (pair it with the dummy SDL video
+        driver). [input_script] replays recorded key
+        events instead of reading the keyboard, and
+        ends the loop when the script does. [controls]
+        names a key binding preset from STYLES.
+        """
+        self.accumulator            = 0.0   # Seconds of simulation owed
         self.area                   = None
+        self.area_pool              = AreaPool()
         self.camera_offset          = (0, 0)
         self.clock                  = pg.time.Clock()
-        self.controller             = Controller('wasd')
+        self.controller             = Controller(controls)
+        self.debug_location         = None
+        self.debug_text             = None
         self.dialog                 = None
+        self.dirty_rendering        = True  # False redraws and presents every full frame
+        self.foreground_doodads     = []
         self.font                   = None
         self.gba_dimensions         = (240, 160)  # GB Advance screen
         self.gba_screen             = pg.Surface(self.gba_dimensions)
+        self.headless               = headless
+        self.dirty_rects            = DirtyRects(self.gba_screen.get_rect())
         self.ignore_dpad_input      = False
+        self.input                  = NO_INPUT  # Button state for the current tick
+        self.input_script           = input_script
+        self.interpolation          = 1.0   # Render position between previous (0) and current (1) tick
+        self.max_frame_time         = 0.25  # Seconds; longer stalls are dropped, not simulated
         self.next_A_action          = ''
         self.menus                  = []
-        self.paused                 = True
+        self.recording              = None  # InputScript capturing key events, if recording
+        self.prefetch_distance      = 4  # Tiles from a warp at which its destination starts loading
+        self.presenter              = Presenter(self.gba_screen, tuple(n * 2 for n in self.gba_dimensions))
+        self.profiler               = FrameProfiler()
         self.running                = True
-        self.screen                 = pg.display.set_mode(tuple(n * 2 for n in self.gba_dimensions))
         self.state                  = 'loop'
-        self.take_new_snapshot      = False
-        self.target_framerate       = 30
+        self.target_framerate       = 60    # Render rate cap; 0 renders as fast as possible
+        self.tick_rate              = 30    # Simulation ticks per second
+        self.ticks                  = 0     # Simulation ticks run so far
         self.trainer                = None
-        self.transition_counter     = 0
-        self.transition_frames      = []
+        self.transition             = None  # Generator of transition frames
+        self.transition_advanced    = False
+        self.transition_buffer      = pg.Surface(self.gba_dimensions)
+        self.transition_frame       = None
         self.transition_max         = 20
+        self.world                  = None  # World, while in an area with connections
 
         self.debug = pg.font.Font(os.path.join('lib', 'CompaqThin.ttf'), 12)
         self.btn_a = colorkeyed_surface_from_file('demo', 'a_btn.png')
@@ -46,19 +81,26 @@ class Game():
 
         self.load_menu_resources()
 
-    def animate_transition(self):
-        if self.state == 'fade_out':
-            self.transition_counter += 1
-            if self.transition_counter == self.transition_max:
-                self.transition_snapshot.fill(BLACK)
-                self.take_new_snapshot = True
-                self.transition_snapshot.set_alpha(0)
-                self.state = 'fade_in'
-        elif self.state == 'fade_in':
-            self.transition_counter -= 1
-            if self.transition_counter == 0:
-                self.state = 'loop'
-                self.controller.poll()
+        pg.event.set_blocked(None)
+        pg.event.set_allowed(QUEUED_EVENTS)
+
+    def advance_transition(self):
+        self.transition_frame = next(self.transition, None)
+        self.transition_advanced = True
+        if not self.transition_frame:
+            self.transition = None
+            self.state = 'loop'
+            self.controller.poll()
+
+    def area_blits(self) -> list[tuple]:
+        viewport = self.get_viewport(self.camera_offset)
+        blits = self.area.background_blits(viewport, self.camera_offset)
+        if self.world:
+            for area, (x, y) in self.world.visible(viewport):
+                offset = (self.camera_offset[0] + x, self.camera_offset[1] + y)
+                blits += area.background_blits(viewport.move(-x, -y), offset)
+
+        return blits
 
     def begin_dialog(self):
         self.ignore_dpad_input = True
@@ -68,16 +110,23 @@ class Game():
         self.dialog.display()
 
     def change_map(self, new_area: str, location: tuple[int] = None):
-        self.area = Area(new_area)
+        if self.trainer and self.area:
+            self.area.render_list.remove(self.trainer)
+
+        self.area = self.area_pool.get(new_area)
 
         if self.trainer:
             if location:
                 self.trainer.set_grid_location(location)
             else:
                 self.trainer.set_grid_location(self.area.start_location)
+            self.area.render_list.add(self.trainer, layer=1, moving=True)
+
+        self.world = World(self.area_pool, self.area) if get_map_registry().connections(new_area) else None
 
     def clear_input(self):
         self.controller.reset()
+        self.input = NO_INPUT
 
     def close_all_menus(self):
         self.menus = []
@@ -89,62 +138,99 @@ class Game():
         if not self.menus:
             self.state = 'loop'
 
-    def create_transition(self, new_area: Area, style: str='fade to black'):
-        snapshot = self.gba_screen.copy()
-
-        match style:
-            case 'fade to black':
-                # Fade out
-                blackout = pg.Surface(self.gba_dimensions)
-                blackout.fill(BLACK)
-                alpha_step = 255 / self.transition_max
-
-                for n in range(self.transition_max):
-                    frame = pg.Surface(self.gba_dimensions)
-                    frame.blit(snapshot, (0, 0))
-                    blackout.set_alpha(alpha_step * n)
-                    frame.blit(blackout, (0, 0))
-                    self.transition_frames.append(frame)
-
-                # Fade in
-                snapshot = self.render_area_snapshot(new_area)
-                snapshot.set_alpha(0)
-
-                for n in range(self.transition_max):
-                    frame = pg.Surface(self.gba_dimensions)
-                    frame.fill(BLACK)
-                    snapshot.set_alpha(alpha_step * n)
-                    frame.blit(snapshot, (0, 0))
-                    self.transition_frames.append(frame)
+    def compose_frame(self) -> list[tuple]:
+        """Everything drawn this frame, bottom layer
+        first, as (surface, dest, area) blits.
+        """
+        blits = []
+
+        if self.state == 'transition':
+            blits.append((self.transition_frame, (0, 0), None))
+
+        if self.state in ['loop', 'menu']:
+            self.camera_offset = self.get_camera_offset(self.world or self.area,
+                                                        self.trainer.center(self.interpolation))
+            blits += self.area_blits()
+            blits += self.entity_blits()
+            blits += self.foreground_blits()
+
+        if self.state == 'loop':
+            if self.dialog:
+                blits.append((self.dialog.image, self.dialog.box_offset, None))
+
+        for menu in self.menus:
+            blits.append((menu.image, menu.coords, None))
+
+        blits += self.debug_blits()
+
+        if self.profiler.image:
+            blits.append((self.profiler.image,
+                          (2, self.gba_dimensions[1] - self.profiler.image.get_height() - 2), None))
+
+        return blits
+
+    def create_transition(self, new_area: str, style: str='fade to black'):
+        """Start streaming transition frames, each
+        composited on demand into one reused buffer.
+        """
+        self.transition = TRANSITIONS[style](
+            old=self.gba_screen.copy(), render_new=lambda: self.render_area_snapshot(new_area),
+            steps=self.transition_max, buffer=self.transition_buffer)
+
+    def cross_border(self):
+        """Hand the trainer over to the neighbouring
+        area its current step leads into, if any
+        """
+        crossing = self.world.crossing(self.trainer.target_location)
+        if not crossing:
+            return
+
+        area, offset = crossing
+        self.area.render_list.remove(self.trainer)
+        self.world.enter(area, offset)
+        self.area = area
+        self.trainer.shift((-offset[0], -offset[1]))
+        self.area.render_list.add(self.trainer, layer=1, moving=True)
+
+    def debug_blits(self) -> list[tuple]:
+        location = f'{self.trainer.grid_location}'
+        if location != self.debug_location:
+            self.debug_location = location
+            self.debug_text = self.debug.render(location, False, BLACK)
+
+        a = self.btn_a_pressed if self.input.is_down('A') else self.btn_a
+        b = self.btn_b_pressed if self.input.is_down('B') else self.btn_b
+        return [(a, (204 + 18, 12), None), (b, (204 + 4, 16), None), (self.debug_text, (20, 12), None)]
 
     def do_next_A_action(self):
         if self.next_A_action:
             method = getattr(self, self.next_A_action.replace(' ', '_'))
             method()
 
-    def draw_area(self):
-        self.gba_screen.blit(self.area.image, self.camera_offset)
+    def entity_blits(self) -> list[tuple]:
+        blits = []
+        for image, coords, source_area in self.sort_entites_for_display():
+            x = coords[0] + self.camera_offset[0]
+            y = coords[1] + self.camera_offset[1]
+            blits.append((image, (x, y), source_area))
 
-    def draw_doodads(self):
-        for doodad in [d for d in self.area.doodads if d.draw_foreground_image \
-            and d.grid_location.y >= self.trainer.grid_location.y]:
-            doodad.draw_foreground_image = False
-            x = doodad.coords()[0] + self.camera_offset[0]
-            y = doodad.coords()[1] + self.camera_offset[1]
-            self.gba_screen.blit(doodad.foreground_image, (x, y))
+        return blits
 
     def execute_area_event(self, event_list: list[dict]):
+        """[event_list] comes from Area.get_tile_events,
+        so it only holds passive events and is
+        already sorted by priority.
+        """
         try:
-            event_list = [e for e in event_list if e['type'] == 'passive']
-            event = sorted(event_list, key=lambda e: e['event']['priority'])[0]
-        except (IndexError, KeyError):
+            event = event_list[0]
+        except IndexError:
             return
 
         match event['event']['type']:
             case 'changeMap':
                 self.state = 'transition'
                 self.trainer.stop()
-                self.controller.reset()
+                self.clear_input()
                 self.create_transition(new_area=event['event']['destinationMap'])
                 self.change_map(new_area=event['event']['destinationMap'],
                                 location=tuple(event['event']['arrivalLocation']))
@@ -154,60 +240,187 @@ class Game():
         self.dialog = None
         self.ignore_dpad_input = False
 
-    def get_camera_offset(self, area: Area, trainer_center: tuple[float]) -> tuple[float]:
+    def foreground_blits(self) -> list[tuple]:
+        blits = []
+        trainer_rect = self.trainer.map_rect(self.interpolation)
+        for doodad in [d for d in self.foreground_doodads if d.draw_foreground_image \
+            and d.grid_location.y >= self.trainer.grid_location.y]:
+            doodad.draw_foreground_image = False
+            overlay = doodad.foreground_image.get_rect(topleft=doodad.coords()).clip(trainer_rect)
+            blits.extend(self.area.foreground_blits(overlay, self.camera_offset))
+
+        return blits
+
+    def get_camera_offset(self, area: Area | World, trainer_center: tuple[float]) -> tuple[float]:
         """Center the trainer on screen without
-        showing anything past the area boundaries.
+        showing anything past the area boundaries
+        (or those of the loaded world).
         """
         screen_center = tuple(d / 2 for d in self.gba_dimensions)
+        rect = area.rect
 
-        if area.rect.w <= self.gba_dimensions[0]:
-            x_from_center = (self.gba_dimensions[0] - area.rect.w) / 2
+        if rect.w <= self.gba_dimensions[0]:
+            x_from_center = (self.gba_dimensions[0] - rect.w) / 2 - rect.x
         else:
             x_from_center = pg.math.clamp(screen_center[0] - trainer_center[0],
-                                          self.gba_dimensions[0] - area.dimensions()[0], 0)
+                                          self.gba_dimensions[0] - rect.right, -rect.x)
 
-        if area.rect.h <= self.gba_dimensions[1]:
-            y_from_center = (self.gba_dimensions[1] - area.rect.h) / 2
+        if rect.h <= self.gba_dimensions[1]:
+            y_from_center = (self.gba_dimensions[1] - rect.h) / 2 - rect.y
         else:
             y_from_center = pg.math.clamp(screen_center[1] - trainer_center[1],
-                                          self.gba_dimensions[1] - area.dimensions()[1], 0)
+                                          self.gba_dimensions[1] - rect.bottom, -rect.y)
 
         return (floor(x_from_center), floor(y_from_center))
 
+    def get_changed_surfaces(self) -> set[pg.Surface]:
+        """Surfaces drawn onto in place since the
+        last frame. Clears their change flags.
+        """
+        changed = set()
+        if self.transition_advanced:
+            self.transition_advanced = False
+            changed.add(self.transition_buffer)
+
+        for layer in [self.dialog, self.profiler] + self.menus:
+            if layer and layer.changed:
+                layer.changed = False
+                changed.add(layer.image)
+
+        return changed
+
+    def get_events(self) -> list[pg.event.Event]:
+        if not self.input_script:
+            return pg.event.get()
+
+        # Ignore the real keyboard; play_input_script() feeds the script's keys
+        return [e for e in pg.event.get() if e.type not in (pg.KEYDOWN, pg.KEYUP)]
+
+    def get_viewport(self, camera_offset: tuple[float]) -> pg.Rect:
+        """Part of the area visible on screen
+        with [camera_offset], in map pixels.
+        """
+        return pg.Rect((-camera_offset[0], -camera_offset[1]), self.gba_dimensions)
+
+    def handle_events(self, events: list[pg.event.Event] | None = None):
+        """Feed [events], by default this frame's
+        queued ones, to the controller, stamped with
+        the time they were drained. The next tick
+        reads them all at once through a snapshot.
+        """
+        if events is None:
+            events = self.get_events()
+        if not events:
+            return
+
+        timestamp = pg.time.get_ticks()
+        accepting = self.state in INPUT_STATES
+        for event in events:
+            if event.type == pg.QUIT:
+                self.running = False
+                continue
+
+            if event.type == pg.VIDEORESIZE:
+                self.presenter.resize(event.size)
+                self.dirty_rects.mark_all()
+                continue
+
+            if event.type == pg.WINDOWEXPOSED:
+                self.presenter.refresh()
+                continue
+
+            if event.type not in (pg.KEYDOWN, pg.KEYUP):
+                continue  # Queued before the rest were blocked, e.g. by pg.init()
+
+            if event.type == pg.KEYDOWN and event.key == pg.K_F3:
+                self.profiler.toggle_overlay(self.debug)
+                continue
+
+            if self.recording:
+                self.recording.record(self.ticks, event)
+
+            if self.state == 'loading':  # Any key dismisses the loading screen
+                self.state = 'loop'
+                accepting = True
+            elif not accepting:
+                continue
+            elif event.type == pg.KEYDOWN:
+                self.controller.handle_keydown(event.key, timestamp)
+            else:
+                self.controller.handle_keyup(event.key, timestamp)
+
     def load_menu_resources(self):
         self.font = Font()
 
     def loop(self):
+        """Simulate in fixed ticks of 1 / tick_rate
+        seconds, however long frames take, and render
+        once per frame, interpolating between ticks.
+        Headless, every frame is exactly one tick.
+        """
+        tick = 1 / self.tick_rate
+
         while self.running:
-            self.clock.tick(self.target_framerate)
-
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    self.running = False
-                else:
-                    if self.state == 'loading':
-                        self.state = 'loop'
-                    elif self.state in ['loop', 'menu']:
-                        if event.type == pg.KEYDOWN:
-                            self.controller.handle_keydown(event.key)
-                        elif event.type == pg.KEYUP:
-                            self.controller.handle_keyup(event.key)
-
-                    elif self.state == 'fade_out':
-                        self.clear_input()
-
-            self.update()
-            self.animate_transition()
+            if self.headless:
+                self.clock.tick()
+                self.accumulator = tick
+            else:
+                elapsed = self.clock.tick(self.target_framerate) / 1000
+                self.accumulator += min(elapsed, self.max_frame_time)
+
+            with self.profiler.phase('input'):
+                self.handle_events()
+            if not self.running:
+                break
+
+            while self.accumulator >= tick:
+                self.accumulator -= tick
+                if self.input_script:
+                    self.play_input_script()
+                    if not self.running:
+                        break
+                self.update()
+            if not self.running:
+                break
+
+            self.interpolation = self.accumulator / tick
+            self.update_screen()
+            self.profiler.end_frame()
+
+        self.area_pool.shutdown()
 
     def next_page(self):
         self.dialog.next_page()
 
-    def preview_entities(self, area: Area, trainer: Trainer, surface: pg.Surface,
-                         camera_offset: tuple[float]) -> pg.Surface:
+    def play_input_script(self):
+        """Feed the script's events for the tick about
+        to run, so playback follows the recording
+        however many ticks each frame runs. Stops once
+        the script is over.
+        """
+        if self.input_script.is_finished(self.ticks):
+            self.running = False
+            return
+
+        self.handle_events(self.input_script.events_for_tick(self.ticks))
+
+    def prefetch_nearby_warps(self):
+        """Start loading the destinations of warps
+        close to the trainer on a worker thread, and
+        pool the ones that have finished.
+        """
+        self.area_pool.collect()
+
+        x, y = self.trainer.grid_location
+        for location, destination in self.area.warps:
+            if abs(location[0] - x) + abs(location[1] - y) <= self.prefetch_distance:
+                self.area_pool.prefetch(destination)
+
+    def preview_entities(self, area: Area, surface: pg.Surface, camera_offset: tuple[float]) -> pg.Surface:
         """Draws a preview of an area's entities
         onto [surface]. Used for transitions.
         """
-        for entity in area.doodads + [trainer]:
+        for entity in area.render_list.visible(self.get_viewport(camera_offset)):
             x = entity.coords()[0] + camera_offset[0]
             y = entity.coords()[1] + camera_offset[1]
             surface.blit(entity.image, (x, y))
@@ -215,24 +428,26 @@ class Game():
         return surface
 
     def render_area_snapshot(self, area_name: str) -> pg.Surface:
-        area = Area(area_name)
-        trainer = Trainer(location=area.start_location)
-        trainer.turn(self.trainer.facing)
-        trainer.draw()
-        camera_offset = self.get_camera_offset(area, trainer.center())
+        # Called once the screen is black, after change_map()
+        # put the trainer into the area at its arrival tile
+        area = self.area if self.area.name == area_name else self.area_pool.get(area_name)
+        camera_offset = self.get_camera_offset(area, self.trainer.center())
 
         snapshot = pg.Surface(self.gba_dimensions)
         snapshot.fill(GRAY)
-        snapshot.blit(area.image, camera_offset)
-        snapshot = self.preview_entities(area, trainer, snapshot, camera_offset)
+        snapshot.blits(area.background_blits(self.get_viewport(camera_offset), camera_offset), doreturn=False)
+        snapshot = self.preview_entities(area, snapshot, camera_offset)
 
         return snapshot
 
     def reset_to_initial_state(self):
         self.state = 'loading'
-        self.paused = True
+        if self.trainer:
+            self.area.render_list.remove(self.trainer)
+            self.trainer = None
         self.change_map('Pallet Town')
         self.trainer = Trainer(location=self.area.start_location)
+        self.area.render_list.add(self.trainer, layer=1, moving=True)
 
     def set_next_A_action(self, action=''):
         if action:
@@ -248,62 +463,114 @@ class Game():
 
     def show_menu(self):
         self.state = 'menu'
-        self.menus.append(Overworld_Sidebar())
+        self.menus.append(Overworld_Sidebar(self.font))
 
     def skip_dialog(self):
         self.dialog.skip()
 
-    def sort_and_draw_entities(self):
-        # TODO: Only blit entities that will be on the screen
-        display_list = self.sort_entites_for_display()
-
-        for entity in display_list:
-            x = entity.coords()[0] + self.camera_offset[0]
-            y = entity.coords()[1] + self.camera_offset[1]
-            self.gba_screen.blit(entity.image, (x, y))
-
-    def sort_entites_for_display(self) -> list[Doodad|Trainer]:
-        # Doodads are already sorted by Y value
-        behind_trainer = [d for d in self.area.doodads if d.grid_location.y <= self.trainer.grid_location.y]
-        in_front_of_trainer = [d for d in self.area.doodads if d.grid_location.y > self.trainer.grid_location.y]
+    def sort_entites_for_display(self) -> list[tuple]:
+        """Blits as (image, map coords, source area),
+        in draw order: visible units and animated
+        doodads, interleaved with the parts of baked
+        static doodads that must cover them.
+        """
+        # The render list stays sorted by Y value; only moved units are re-placed
+        self.area.render_list.refresh()
 
         # Only check overlaps for nearby, valid entities
-        for doodad in [d for d in self.area.doodads if d.show_in_front_of_trainer]:
-            if doodad.is_nearby(self.trainer.grid_location):
-                if doodad.is_colliding_with(self.trainer.rect):
-                    doodad.draw_foreground_image = True
-
-        return behind_trainer + [self.trainer] + in_front_of_trainer
+        trainer_rect = self.trainer.map_rect(self.interpolation)
+        self.foreground_doodads = self.area.get_doodads_in_rect(trainer_rect)
+        for doodad in self.foreground_doodads:
+            if doodad.show_in_front_of_trainer and doodad.map_rect().colliderect(trainer_rect):
+                doodad.draw_foreground_image = True
+
+        blits = []
+        viewport = self.get_viewport(self.camera_offset)
+        for entity in self.area.render_list.visible(viewport, self.interpolation):
+            blits.append((entity.grid_location.y, 1, entity.image, entity.coords(self.interpolation), None))
+            for doodad, overlap in self.area.get_occluders(entity, self.interpolation):
+                x, y = doodad.coords()
+                blits.append((doodad.grid_location.y, 0, doodad.image, overlap.topleft,
+                              overlap.move(-x, -y)))
+
+        if self.world:
+            for area, (ox, oy) in self.world.visible(viewport):
+                for entity in area.render_list.visible(viewport.move(-ox, -oy), self.interpolation):
+                    x, y = entity.coords(self.interpolation)
+                    blits.append((entity.grid_location.y + oy / 16, 1, entity.image, (x + ox, y + oy), None))
+
+        # Stable sort: units on one row keep their render list order
+        blits.sort(key=lambda b: b[:2])
+        return [b[2:] for b in blits]
 
     def update(self):
+        self.ticks += 1
+        self.input = self.controller.snapshot()
+
         if self.state == 'loop':
-            trainer_direction = self.controller.get_dpad_input() if not self.ignore_dpad_input else None
-            self.trainer.update(area=self.area, direction=trainer_direction,
-                                B_pressed=self.controller.button('B').is_down,
-                                run_enabled=self.area.is_running_allowed())
+            with self.profiler.phase('trainer'):
+                self.trainer.update(area=self.world or self.area,
+                                    inputs=NO_INPUT if self.ignore_dpad_input else self.input,
+                                    run_enabled=self.area.is_running_allowed())
+
+            with self.profiler.phase('area'):
+                self.area.update()
+                if self.world:
+                    self.world.update()
+                    self.cross_border()
+                self.prefetch_nearby_warps()
+
+            with self.profiler.phase('events'):
+                self.execute_area_event(self.area.get_tile_events(location=self.trainer.grid_location, active=False))
+
+            if self.input.was_pressed('START'):
+                self.show_menu()
+        else:
+            # Held still, e.g. under a menu opened mid-step; don't interpolate
+            self.trainer.previous_location.update(self.trainer.grid_location)
 
-            self.area.update()
+        with self.profiler.phase('ui'):
+            self.update_ui()
 
-            self.execute_area_event(self.area.get_tile_events(location=self.trainer.grid_location, active=False))
+        if self.state == 'transition':
+            self.advance_transition()
 
-            if self.controller.button('START').flag:
-                self.show_menu()
+        self.controller.update()
 
-        self.camera_offset = self.get_camera_offset(self.area, self.trainer.center())
+    def update_screen(self):
+        with self.profiler.phase('render'):
+            blits = self.compose_frame()
+
+            if self.dirty_rendering:
+                rects = self.dirty_rects.collect(blits, self.get_changed_surfaces())
+                if not rects:
+                    return  # Nothing changed; the last frame is still on screen
+            else:
+                rects = [self.gba_screen.get_rect()]
+
+            for rect in rects:
+                self.gba_screen.set_clip(rect)
+                self.gba_screen.fill(GRAY)
+                self.gba_screen.blits(blits, doreturn=False)
+            self.gba_screen.set_clip(None)
+            self.profiler.count('blits', len(blits) * len(rects))
 
+        with self.profiler.phase('present'):
+            self.presenter.present(rects)
+
+    def update_ui(self):
+        """Advance the dialog or top menu and work
+        out what the A button does next.
+        """
         if self.dialog:
             self.dialog.update()
-            if self.dialog.state == 'next':
-                self.set_next_A_action('next page')
-            elif self.dialog.state == 'exit':
-                self.set_next_A_action('exit dialog')
-            else:
-                self.set_next_A_action('skip dialog')
+            game_action = self.dialog.get_action_from_input(self.input)
+            if game_action:
+                getattr(self, game_action)()
 
         elif self.menus:
             top_menu = self.menus[-1]
-            action, arg = top_menu.get_action_from_input(
-                self.controller.get_flags())
+            action, arg = top_menu.get_action_from_input(self.input)
             if action:
                 game_action = action(arg)
                 if game_action:
@@ -312,47 +579,5 @@ class Game():
 
         else:
             self.set_next_A_action()
-
-        if self.controller.button('A').flag:
-            self.do_next_A_action()
-
-        self.update_screen()
-
-        self.controller.update()
-
-    def update_screen(self):
-        self.gba_screen.fill(GRAY)
-
-        if self.state == 'transition':
-            try:
-                self.gba_screen.blit(self.transition_frames.pop(0), (0, 0))
-            except IndexError:
-                self.state = 'loop'
-                self.controller.poll()
-
-        if self.state in ['loop', 'menu']:
-            self.draw_area()
-            self.sort_and_draw_entities()
-            self.draw_doodads()
-
-        if self.state == 'loop':
-            if self.dialog:
-                self.gba_screen.blit(self.dialog.image, self.dialog.box_offset)
-
-        for menu in self.menus:
-            self.gba_screen.blit(menu.image, menu.coords)
-
-        # Debug stuff
-        a = self.btn_a_pressed if self.controller.button('A').is_down else self.btn_a
-        b = self.btn_b_pressed if self.controller.button('B').is_down else self.btn_b
-        self.gba_screen.blit(a, (204 + 18, 12))
-        self.gba_screen.blit(b, (204 + 4, 16))
-        text = self.debug.render(f'{self.trainer.grid_location}', False, BLACK)
-        self.gba_screen.blit(text, (20, 12))
-
-        self.upsize_and_display_screen()
-
-    def upsize_and_display_screen(self):
-        self.screen.fill(GRAY)
-        pg.transform.scale(self.gba_screen, (pg.display.get_window_size()), self.screen)
-        pg.display.flip()
+            if self.input.was_pressed('A'):
+                self.do_next_A_action()
@@ -2,6 +2,7 @@ import os
 
 import pygame as pg
 
+from assets import asset_cache
 from palette import TRANSPARENT
 
 
@@ -14,9 +15,10 @@ def colorkeyed_surface(dimensions: tuple[int], fill: bool=False) -> pg.Surface:
 
 
 def colorkeyed_surface_from_file(*filepath_parts: str, fill: bool=False) -> pg.Surface:
-    surface = pg.image.load(os.path.join(*filepath_parts))
-    surface.set_colorkey(TRANSPARENT)
+    surface = asset_cache.image(os.path.join(*filepath_parts), colorkey=TRANSPARENT, convert=True)
     if fill:
+        surface = surface.copy()  # Cached surfaces are shared
+        surface.set_colorkey(TRANSPARENT)  # Without RLE, which is slow to draw onto
         surface.fill(TRANSPARENT)
     return surface
 
@@ -1,14 +1,56 @@
+import argparse
+import os
+
 import pygame as pg
 
+from controller import STYLES
 from game import Game
+from replay import InputScript
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Py-k-mon')
+    parser.add_argument('--headless', action='store_true',
+                        help='run without a window or frame cap and report ticks per second')
+    parser.add_argument('--controls', choices=list(STYLES), default='wasd',
+                        help='key bindings (default: %(default)s)')
+    parser.add_argument('--replay', metavar='PATH',
+                        help='play back key events recorded with --record')
+    parser.add_argument('--record', metavar='PATH',
+                        help='save key events to PATH on exit')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='profile every frame and save a Chrome trace (JSON) to PATH on exit')
+    args = parser.parse_args()
+    if args.headless and not args.replay:
+        parser.error('--headless needs --replay; nothing else can end the run')
+    return args
 
 
 def main():
+    args = parse_args()
+    if args.headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+
     pg.init()
     pg.display.set_caption('Py-k-mon')
-    game = Game()
+    input_script = InputScript.load(args.replay) if args.replay else None
+    game = Game(headless=args.headless, input_script=input_script, controls=args.controls)
+    if args.record:
+        game.recording = InputScript()
+    if args.trace:
+        game.profiler.start_trace()
     game.reset_to_initial_state()
+
+    start = pg.time.get_ticks()
     game.loop()
+    seconds = (pg.time.get_ticks() - start) / 1000
+
+    if args.record:
+        game.recording.save(args.record, game.ticks)
+    if args.trace:
+        game.profiler.dump_trace(args.trace)
+    if args.headless:
+        print(f'{game.ticks} ticks in {seconds:.2f}s: {game.ticks / max(seconds, 0.001):.0f} ticks/s')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+
+from pack import get_asset_pack
+
+
+MAPS_FILE = os.path.join('data', 'maps.json')
+
+log = logging.getLogger(__name__)
+
+
+def is_point(value) -> bool:
+    return isinstance(value, list) and len(value) == 2 \
+        and all(isinstance(n, int) for n in value)
+
+
+def validate_area(record: dict):
+    """Raise RuntimeError if an area record is
+    missing fields that Area relies on.
+    """
+    name = record.get('name')
+    if not isinstance(name, str):
+        raise RuntimeError(f'Area record without a name: {record}')
+
+    def require(condition: bool, message: str):
+        if not condition:
+            raise RuntimeError(f'Area "{name}": {message}')
+
+    require(is_point(record.get('startLocation')), 'startLocation must be [x, y]')
+    require(isinstance(record.get('allowRunning'), bool), 'allowRunning must be a bool')
+    require(isinstance(record.get('doodads'), list), 'doodads must be a list')
+    require(isinstance(record.get('events'), list), 'events must be a list')
+    require(isinstance(record.get('tilemap', ''), str), 'tilemap must be a file name')
+    require(isinstance(record.get('connections', []), list), 'connections must be a list')
+
+    for connection in record.get('connections', []):
+        require(isinstance(connection.get('area'), str) and is_point(connection.get('offset')),
+                f'connection needs an area and an [x, y] offset: {connection}')
+
+    for doodad in record['doodads']:
+        require(isinstance(doodad.get('type'), str), f'doodad without a type: {doodad}')
+        require(all(is_point(l) for l in doodad.get('locations', [None])),
+                f'doodad "{doodad["type"]}" has invalid locations')
+        for flag in ['showInFrontOfTrainer', 'animated']:
+            require(isinstance(doodad.get(flag), bool), f'doodad "{doodad["type"]}" needs {flag}')
+
+    for event in record['events']:
+        require(event.get('type') in ['active', 'passive'], f'event has invalid type: {event}')
+        require(is_point(event.get('location')), f'event has invalid location: {event}')
+        require(isinstance(event.get('event'), dict) and 'type' in event['event'],
+                f'event has no event body: {event}')
+
+        if event['type'] == 'active':
+            require(event.get('facing') in range(4), f'active event needs facing: {event}')
+        else:
+            require('priority' in event['event'], f'passive event needs priority: {event}')
+
+        if event['event']['type'] == 'changeMap':
+            require(isinstance(event['event'].get('destinationMap'), str),
+                    f'changeMap event needs destinationMap: {event}')
+            require(is_point(event['event'].get('arrivalLocation')),
+                    f'changeMap event needs arrivalLocation: {event}')
+
+
+class MapRegistry():
+    """Parses the world file once and indexes its
+    areas by name. Records are shared between
+    Areas and must be treated as read-only.
+    """
+    def __init__(self, filepath: str = MAPS_FILE):
+        self.filepath = filepath
+
+        self.areas    = {}
+        self.links    = {}  # name: [(neighbour name, (x, y) offset in tiles)]
+
+        self.load()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.areas
+
+    def close_warps(self):
+        """Drop changeMap events to unknown areas,
+        like connections to them, so stepping on one
+        does nothing instead of failing
+        """
+        for name, record in self.areas.items():
+            events = []
+            for event in record['events']:
+                destination = event['event'].get('destinationMap')
+                if event['event']['type'] == 'changeMap' and destination not in self.areas:
+                    log.warning('Area "%s" warps to unknown area "%s" at %s; the warp stays closed',
+                                name, destination, event['location'])
+                    continue
+                events.append(event)
+            record['events'] = events
+
+    def connections(self, name: str) -> list[tuple]:
+        """Known areas joined to [name] at its edges,
+        with the tile offset of each one's top left
+        corner. A connection declared by either area
+        counts for both.
+        """
+        return self.links.get(name, [])
+
+    def get(self, name: str) -> dict:
+        try:
+            return self.areas[name]
+        except KeyError:
+            raise KeyError(f'Unknown area "{name}"') from None
+
+    def index_connections(self):
+        self.links = {}
+        for name, record in self.areas.items():
+            for connection in record.get('connections', []):
+                neighbour = connection['area']
+                if neighbour not in self.areas:
+                    log.warning('Area "%s" connects to unknown area "%s"; the edge stays closed', name, neighbour)
+                    continue
+                x, y = connection['offset']
+                for a, b, offset in [(name, neighbour, (x, y)), (neighbour, name, (-x, -y))]:
+                    if b not in [n for n, _ in self.links.get(a, [])]:
+                        self.links.setdefault(a, []).append((b, offset))
+
+    def load(self):
+        asset_pack = get_asset_pack()
+        data = asset_pack and asset_pack.document(self.filepath)
+        if not data:
+            with open(self.filepath) as f:
+                data = json.load(f)
+
+        areas = {}
+        for record in data['areas']:
+            validate_area(record)
+            if record['name'] in areas:
+                raise RuntimeError(f'Area "{record["name"]}" is defined more than once')
+            areas[record['name']] = record
+
+        self.areas = areas
+        self.close_warps()
+        self.index_connections()
+
+    def names(self) -> list[str]:
+        return list(self.areas)
+
+
+_registry = None
+
+
+def get_map_registry() -> MapRegistry:
+    """Return the shared registry, parsing
+    the world file on first use.
+    """
+    global _registry
+    if _registry is None:
+        _registry = MapRegistry()
+    return _registry
@@ -1,7 +1,7 @@
 import pygame as pg
 from pygame.math import Vector2
 
-from controller import Button
+from controller import InputSnapshot
 from font import Font
 from helpers import colorkeyed_surface, colorkeyed_surface_from_file, \
                     increment_with_wrap
@@ -9,14 +9,16 @@ from palette import TRANSPARENT
 
 
 class Menu(pg.sprite.Sprite):
-    def __init__(self):
+    def __init__(self, font: Font):
         self.background      = None
+        self.changed         = False  # Image was redrawn since last displayed
         self.coords          = Vector2(0, 0)
         self.cursor          = None
         self.cursor_offset   = (0, 0)
         self.cursor_position = 0
         self.cursor_type     = ''
-        self.font            = Font()
+        self.drawn_cursor    = None   # Cursor position the image was last drawn with
+        self.font            = font
         self.item_labels     = []
         self.items           = []
         self.name            = ''
@@ -32,6 +34,9 @@ class Menu(pg.sprite.Sprite):
             return 'close_all_menus'
 
     def draw(self):
+        if self.cursor_position == self.drawn_cursor:
+            return
+
         self.image.fill(TRANSPARENT)
         self.image.blit(self.background, (0, 0))
 
@@ -39,12 +44,11 @@ class Menu(pg.sprite.Sprite):
             self.image.blit(item['image'], item['coords'])
 
         self.image.blit(self.cursor, self.get_cursor_coords())
+        self.drawn_cursor = self.cursor_position
+        self.changed = True
 
-    def get_action_from_input(self, buttons: list[Button]) -> tuple:
-        if not buttons:
-            return None, ''
-
-        match buttons[-1].name:
+    def get_action_from_input(self, inputs: InputSnapshot) -> tuple:
+        match inputs.last_pressed():
             case 'START':
                 return self.close, ''
             case 'A':
@@ -91,8 +95,8 @@ class Menu(pg.sprite.Sprite):
 
 
 class Overworld_Sidebar(Menu):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, font: Font):
+        super().__init__(font)
 
         self.coords          = (159, 1)
         self.cursor_type     = 'row'
@@ -0,0 +1,237 @@
+"""Pack images, grids and map records into one
+archive that loads without decoding.
+
+    python pack.py
+
+writes cache/assets.pack: the raw pixels of the
+images the game loads (see packed_files()), the
+passability and tilemap grids as arrays, and the
+parsed world file and atlas manifest, with an
+index of where each one starts. At run time the
+archive is memory mapped and surfaces are built
+straight on top of it. Without an archive, or for
+any file edited since it was built, the loose
+files are loaded instead; re-run this before
+shipping.
+"""
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import struct
+from threading import Lock
+
+import numpy as np
+import pygame as pg
+
+
+HEADER = struct.Struct('<8sQQ')  # Magic, index offset, index length
+PACK_ALIGNMENT = 8  # Bytes; every entry starts on a multiple of this
+PACK_DOCUMENTS = [os.path.join('data', 'maps.json'), os.path.join('lib', 'atlas', 'atlas.json')]
+PACK_FILE = os.path.join('cache', 'assets.pack')
+PACK_MAGIC = b'PYKMON01'
+PACKED_IMAGE_DIRS = ['demo']  # Packed whole, besides the files of each area
+
+
+def file_digest(filepath: str) -> str:
+    with open(filepath, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def is_unchanged(filepath: str, digest: str | None) -> bool:
+    """Whether [filepath] still hashes to [digest].
+    Compares contents rather than mtimes, which a
+    checkout sets in whatever order it writes files.
+    """
+    try:
+        return file_digest(filepath) == digest
+    except OSError:
+        return True  # Shipped without the loose file
+
+
+def pack_key(filepath: str) -> str:
+    return os.path.normpath(filepath).replace(os.sep, '/')
+
+
+class AssetPack():
+    """A memory-mapped archive written by
+    build_pack(). Entries are only read when asked
+    for, so loading one costs page faults rather
+    than file reads and PNG inflation. Surfaces and
+    arrays share the mapped pages, which are copy
+    on write: drawing onto one never reaches the
+    file.
+    """
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+
+        with open(filepath, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.mtime    = os.path.getmtime(filepath)
+
+        magic, offset, length = HEADER.unpack_from(self.data)
+        if magic != PACK_MAGIC:
+            raise RuntimeError(f'{filepath} is not an asset pack of this version')
+        self.index    = json.loads(self.data[offset:offset + length])
+
+    def document(self, filepath: str) -> dict | None:
+        """The parsed JSON of [filepath]"""
+        entry = self.entry('documents', filepath)
+        if not entry:
+            return None
+        offset, length = entry
+        return marshal.loads(self.data[offset:offset + length])
+
+    def entry(self, kind: str, filepath: str) -> list | None:
+        """Index entry of [filepath], unless the file
+        has changed since the archive was built
+        """
+        entry = self.index[kind].get(pack_key(filepath))
+        if entry and self.is_current(filepath):
+            return entry
+        return None
+
+    def grid(self, filepath: str) -> np.ndarray | None:
+        """The array packed for [filepath], e.g. the
+        passability grid of a _passable.png
+        """
+        entry = self.entry('grids', filepath)
+        if not entry:
+            return None
+        offset, dtype, shape = entry
+        return np.frombuffer(self.data, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+
+    def image(self, filepath: str) -> pg.Surface | None:
+        entry = self.entry('images', filepath)
+        if not entry:
+            return None
+        offset, width, height, pixel_format = entry
+        length = width * height * len(pixel_format)
+        return pg.image.frombuffer(memoryview(self.data)[offset:offset + length], (width, height), pixel_format)
+
+    def is_current(self, filepath: str) -> bool:
+        try:
+            return os.path.getmtime(filepath) <= self.mtime
+        except OSError:
+            return True  # Shipped without the loose file
+
+    @classmethod
+    def load(cls, filepath: str = PACK_FILE):
+        """The archive at [filepath], or None if there
+        is no usable one
+        """
+        try:
+            return cls(filepath)
+        except (OSError, ValueError, RuntimeError):
+            return None
+
+
+_pack = None
+_pack_lock = Lock()
+
+
+def build_pack(filepath: str = PACK_FILE):
+    from passability import grid_from_surface
+    from tilemap import TILE_SIZE
+
+    blobs = bytearray(HEADER.size)
+    index = dict(documents={}, grids={}, images={})
+
+    def add(data: bytes) -> int:
+        blobs.extend(bytes(-len(blobs) % PACK_ALIGNMENT))
+        offset = len(blobs)
+        blobs.extend(data)
+        return offset
+
+    def add_grid(source: str, grid: np.ndarray):
+        index['grids'][pack_key(source)] = [add(grid.tobytes()), grid.dtype.str, list(grid.shape)]
+
+    for source in packed_files():
+        if source.endswith('_passable.png'):
+            add_grid(source, grid_from_surface(pg.image.load(source)))
+        elif source.endswith('.png'):
+            surface = pg.image.load(source)
+            pixel_format = 'RGBA' if surface.get_flags() & pg.SRCALPHA else 'RGB'
+            index['images'][pack_key(source)] = [add(pg.image.tobytes(surface, pixel_format)),
+                                                 *surface.get_size(), pixel_format]
+        else:
+            with open(source) as f:
+                data = json.load(f)
+            if data['tileSize'] != TILE_SIZE:
+                raise RuntimeError(f'{source} has {data["tileSize"]} pixel tiles, not {TILE_SIZE}')
+            add_grid(source, np.array(data['tiles'], dtype=np.uint16).T)
+
+    for source in PACK_DOCUMENTS:
+        if os.path.exists(source):
+            with open(source) as f:
+                data = marshal.dumps(json.load(f))
+            index['documents'][pack_key(source)] = [add(data), len(data)]
+
+    index_data = json.dumps(index).encode()
+    offset = add(index_data)
+    HEADER.pack_into(blobs, 0, PACK_MAGIC, offset, len(index_data))
+
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    temp = f'{filepath}.{os.getpid()}.tmp'
+    with open(temp, 'wb') as f:
+        f.write(blobs)
+    os.replace(temp, filepath)
+
+    print(f'{filepath}: {len(index["images"])} images, {len(index["grids"])} grids, '
+          f'{len(index["documents"])} documents in {len(blobs) // 1024} KiB')
+
+
+def get_asset_pack() -> AssetPack | None:
+    """Return the shared archive, mapping it on
+    first use, or None if it has not been built.
+    """
+    global _pack
+    with _pack_lock:
+        if _pack is None:
+            _pack = AssetPack.load() or False
+        return _pack or None
+
+
+def packed_files() -> list[str]:
+    """Files the game reads at run time: the
+    atlases (or the sheets they hold, if none are
+    built), the demo buttons and, for every area in
+    the world file, its passability and its tilemap
+    or else its map image. Sheets served from an
+    atlas and maps no area uses are left out.
+    """
+    from atlas import ATLAS_DIR, MANIFEST_FILE, PACKED_DIRS
+    from map_registry import get_map_registry
+    from tilemap import TILEMAP_DIR
+
+    files = []
+    if os.path.exists(MANIFEST_FILE):
+        with open(MANIFEST_FILE) as f:
+            manifest = json.load(f)
+        files += [os.path.join(ATLAS_DIR, filename) for filename in manifest['atlases'].values()]
+    else:
+        for directory in PACKED_DIRS:
+            files += [os.path.join('lib', directory, filename)
+                      for filename in sorted(os.listdir(os.path.join('lib', directory)))
+                      if filename.endswith('.png')]
+
+    for directory in PACKED_IMAGE_DIRS:
+        files += [os.path.join(directory, filename)
+                  for filename in sorted(os.listdir(directory)) if filename.endswith('.png')]
+
+    registry = get_map_registry()
+    for name in registry.names():
+        record = registry.get(name)
+        formatted_name = name.lower().replace(' ', '_')
+        files.append(os.path.join('lib', 'maps', f'{formatted_name}_passable.png'))
+        if 'tilemap' in record:
+            files += [os.path.join(TILEMAP_DIR, f'{record["tilemap"]}{ext}') for ext in ['.png', '.json']]
+        else:
+            files.append(os.path.join('lib', 'maps', f'{formatted_name}.png'))
+
+    return list(dict.fromkeys(files))  # Areas may share a tilemap
+
+
+if __name__ == '__main__':
+    build_pack()
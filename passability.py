@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pygame as pg
+
+from pack import get_asset_pack
+
+
+SIDECAR_DIR = os.path.join('cache', 'maps')
+
+# Bits dropped when packing RGB into 16-bit (RGB565)
+# colour; anything that packs to 0 counts as black.
+RGB565_SHIFTS = np.array([3, 2, 3], dtype=np.uint8)
+
+
+def grid_from_surface(surface: pg.Surface) -> np.ndarray:
+    """Boolean (x, y) array, such that each tile is
+    passable (True) unless its pixel is black.
+    """
+    return (pg.surfarray.array3d(surface) >> RGB565_SHIFTS).any(axis=2)
+
+
+def load_passability(filepath: str) -> np.ndarray:
+    """Load the passability grid for the PNG at
+    [filepath], from the asset pack or from its .npy
+    sidecar when that is newer than the PNG,
+    otherwise from the PNG itself (refreshing the
+    sidecar).
+    """
+    asset_pack = get_asset_pack()
+    grid = asset_pack and asset_pack.grid(filepath)
+    if grid is not None:
+        return grid
+
+    sidecar = sidecar_path(filepath)
+    try:
+        if os.path.getmtime(sidecar) >= os.path.getmtime(filepath):
+            return np.load(sidecar)
+    except (OSError, ValueError):
+        pass
+
+    grid = grid_from_surface(pg.image.load(filepath))
+    write_sidecar(sidecar, grid)
+    return grid
+
+
+def sidecar_path(filepath: str) -> str:
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    return os.path.join(SIDECAR_DIR, f'{name}.npy')
+
+
+def write_sidecar(sidecar: str, grid: np.ndarray):
+    """Best effort; a read-only checkout just
+    keeps decoding the PNG.
+    """
+    temp = f'{sidecar}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+        with open(temp, 'wb') as f:
+            np.save(f, grid)
+        os.replace(temp, sidecar)
+    except OSError:
+        pass
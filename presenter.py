@@ -0,0 +1,83 @@
+import pygame as pg
+
+from palette import BLACK
+
+
+class Presenter():
+    """Scales a low resolution screen up to the
+    window and presents it.
+
+    The screen is drawn at the largest whole
+    multiple of its size that fits the window,
+    centered with black bars around it, so every
+    pixel doubles cleanly and changed regions can
+    be scaled on their own. A window smaller than
+    the screen gets a fractional, full-frame scale.
+    The window size is cached and only changes on
+    resize().
+    """
+    def __init__(self, source: pg.Surface, window_size: tuple[int], flags: int = pg.RESIZABLE):
+        self.source      = source
+
+        self.bars_drawn  = False       # Letterbox bars are on screen
+        self.scale       = 1           # Whole-number scale, or 0 for fractional
+        self.viewport    = pg.Rect(0, 0, 0, 0)  # Window area showing the source
+        self.window      = pg.display.set_mode(window_size, flags)
+        self.window_size = self.window.get_size()
+
+        self.layout()
+
+    def layout(self):
+        """Fit the source to the cached window size"""
+        source_w, source_h = self.source.get_size()
+        window_w, window_h = self.window_size
+        self.scale = min(window_w // source_w, window_h // source_h)
+
+        if self.scale:
+            size = (source_w * self.scale, source_h * self.scale)
+        else:
+            fit = min(window_w / source_w, window_h / source_h)
+            size = (max(1, int(source_w * fit)), max(1, int(source_h * fit)))
+
+        self.viewport = pg.Rect((0, 0), size)
+        self.viewport.center = (window_w // 2, window_h // 2)
+        self.bars_drawn = False
+
+    def present(self, rects: list[pg.Rect]):
+        """Scale the changed [rects] of the source up
+        to the window and show them. Nothing is done
+        for a frame without changes.
+        """
+        if not rects:
+            return
+
+        if not self.bars_drawn:
+            self.window.fill(BLACK)
+            self.bars_drawn = True
+            rects = [self.source.get_rect()]
+
+        if not self.scale or rects[0] == self.source.get_rect():
+            pg.transform.scale(self.source, self.viewport.size, self.window.subsurface(self.viewport))
+            pg.display.flip()
+            return
+
+        updated = []
+        for rect in rects:
+            target = pg.Rect(self.viewport.left + rect.left * self.scale,
+                             self.viewport.top + rect.top * self.scale,
+                             rect.width * self.scale, rect.height * self.scale)
+            pg.transform.scale(self.source.subsurface(rect), target.size, self.window.subsurface(target))
+            updated.append(target)
+
+        pg.display.update(updated)
+
+    def refresh(self):
+        """Show the last presented frame again, e.g.
+        after the window was uncovered.
+        """
+        pg.display.flip()
+
+    def resize(self, window_size: tuple[int]):
+        self.window = pg.display.get_surface()
+        self.window_size = tuple(window_size)
+        self.layout()
@@ -0,0 +1,159 @@
+import json
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import pygame as pg
+
+from palette import CYAN
+
+
+HISTORY_FRAMES = 240      # Frames kept for rolling percentiles
+NO_PHASE = nullcontext()  # Stand-in for phase() while not profiling
+OVERLAY_COLUMNS = [0, 80, 110, 140]  # Right edge of each overlay column
+OVERLAY_INTERVAL = 30     # Frames between overlay redraws
+PHASES = ['input', 'trainer', 'area', 'events', 'ui', 'render', 'present', 'frame']
+TRACE_LIMIT = 500_000     # Trace events kept before tracing stops
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank [p]th percentile of [values]"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class FrameProfiler():
+    """Per-frame timings of each phase of the game
+    loop, with blit and allocation counts.
+
+    Only runs while the overlay is shown or a trace
+    is being recorded. Allocations are the net
+    number of Python memory blocks allocated during
+    the frame (Surfaces included), since pygame has
+    no hook for counting surfaces alone.
+    """
+    def __init__(self):
+        self.changed       = False  # Overlay was redrawn since last displayed
+        self.counts        = {}     # name: total this frame
+        self.frame_blocks  = 0      # sys.getallocatedblocks() at frame start
+        self.frame_start   = 0.0
+        self.frames        = 0
+        self.history       = {}     # name: deque of recent per-frame values
+        self.image         = None   # Overlay
+        self.overlay_font  = None
+        self.show_overlay  = False
+        self.times         = {}     # phase: seconds this frame
+        self.trace_events  = []     # Chrome trace events
+        self.tracing       = False
+
+        self.start_frame()
+
+    @property
+    def active(self) -> bool:
+        return self.show_overlay or self.tracing
+
+    def add_time(self, name: str, start: float, end: float):
+        self.times[name] = self.times.get(name, 0.0) + end - start
+        if self.tracing:
+            self.trace_events.append(dict(name=name, ph='X', pid=1, tid=1,
+                                          ts=start * 1e6, dur=(end - start) * 1e6))
+            if len(self.trace_events) >= TRACE_LIMIT:
+                self.tracing = False
+
+    def count(self, name: str, n: int = 1):
+        if self.active:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    def draw_overlay(self):
+        """Table of phase percentiles and median
+        counts, one column at a time so it lines up
+        in a proportional font.
+        """
+        rows = [['ms', 'p50', 'p95', 'p99']]
+        for name in PHASES:
+            if self.history.get(name):
+                rows.append([name] + [f'{t:.2f}' for t in self.percentiles(name)])
+        for name in ['blits', 'allocs']:
+            if self.history.get(name):
+                rows.append([name, f'{self.percentiles(name)[0]:.0f}'])
+
+        line_h = self.overlay_font.get_linesize()
+        self.image = pg.Surface((OVERLAY_COLUMNS[-1] + 3, line_h * len(rows) + 4), pg.SRCALPHA)
+        self.image.fill((0, 0, 0, 176))
+        for n, row in enumerate(rows):
+            for col, cell in enumerate(row):
+                text = self.overlay_font.render(cell, False, CYAN)
+                x = 3 if col == 0 else OVERLAY_COLUMNS[col] - text.get_width()
+                self.image.blit(text, (x, 2 + n * line_h))
+        self.changed = True
+
+    def dump_trace(self, filepath: str):
+        """Write recorded phases as Chrome trace JSON,
+        viewable in chrome://tracing or Perfetto.
+        """
+        with open(filepath, 'w') as f:
+            json.dump(dict(traceEvents=self.trace_events, displayTimeUnit='ms'), f)
+
+    def end_frame(self):
+        if not self.active:
+            return
+
+        self.add_time('frame', self.frame_start, time.perf_counter())
+        self.counts['allocs'] = sys.getallocatedblocks() - self.frame_blocks
+
+        for name, value in list(self.times.items()) + list(self.counts.items()):
+            if name not in self.history:
+                self.history[name] = deque(maxlen=HISTORY_FRAMES)
+            self.history[name].append(value * 1000 if name in self.times else value)
+
+        if self.tracing:
+            self.trace_events.append(dict(name='counts', ph='C', pid=1, tid=1,
+                                          ts=self.frame_start * 1e6, args=dict(self.counts)))
+
+        self.frames += 1
+        if self.show_overlay and self.frames % OVERLAY_INTERVAL == 0:
+            self.draw_overlay()
+
+        self.start_frame()
+
+    def percentiles(self, name: str) -> tuple[float]:
+        """p50, p95 and p99 of [name] over recent
+        frames, in ms for phases
+        """
+        return tuple(percentile(self.history[name], p) for p in [50, 95, 99])
+
+    def phase(self, name: str):
+        """Context manager timing one phase. Phases
+        entered more than once per frame add up.
+        """
+        return self.timed(name) if self.active else NO_PHASE
+
+    def start_frame(self):
+        self.counts = {}
+        self.frame_blocks = sys.getallocatedblocks()
+        self.frame_start = time.perf_counter()
+        self.times = {}
+
+    def start_trace(self):
+        self.trace_events = []
+        self.tracing = True
+        self.start_frame()
+
+    @contextmanager
+    def timed(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, start, time.perf_counter())
+
+    def toggle_overlay(self, font: pg.font.Font):
+        self.show_overlay = not self.show_overlay
+        self.overlay_font = font
+        if self.show_overlay:
+            self.history = {}
+            self.start_frame()
+            self.draw_overlay()
+        else:
+            self.image = None
@@ -0,0 +1,81 @@
+from bisect import bisect_left, bisect_right
+
+import pygame as pg
+
+
+class RenderList():
+    """Entities kept in draw order by grid Y value.
+
+    Each entity's sort key is (y, layer, serial):
+    lower layers draw first among entities on the
+    same row, and serial keeps insertion order
+    stable. Only entities registered as moving are
+    re-checked by refresh(), and only the ones whose
+    Y value changed are re-inserted.
+    """
+    def __init__(self):
+        self.entities = []  # Draw order
+        self.keys     = []  # Sort key of each entry in self.entities
+        self.moving   = []  # Entities that may change Y value
+        self.placed   = {}  # entity: current sort key
+        self.serial   = 0
+        self.tallest  = 0   # Tallest image height, in pixels
+
+    def __contains__(self, entity) -> bool:
+        return entity in self.placed
+
+    def __iter__(self):
+        return iter(self.entities)
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def add(self, entity, layer: int = 0, moving: bool = False):
+        self.serial += 1
+        self.insert(entity, (entity.grid_location.y, layer, self.serial))
+        self.tallest = max(self.tallest, entity.image.get_height())
+        if moving:
+            self.moving.append(entity)
+
+    def insert(self, entity, key: tuple):
+        n = bisect_right(self.keys, key)
+        self.keys.insert(n, key)
+        self.entities.insert(n, entity)
+        self.placed[entity] = key
+
+    def refresh(self):
+        """Re-sort moving entities whose row changed"""
+        for entity in self.moving:
+            key = self.placed[entity]
+            if key[0] != entity.grid_location.y:
+                self.take(entity)
+                self.insert(entity, (entity.grid_location.y, key[1], key[2]))
+
+    def remove(self, entity):
+        self.take(entity)
+        if entity in self.moving:
+            self.moving.remove(entity)
+
+    def take(self, entity):
+        n = bisect_left(self.keys, self.placed.pop(entity))
+        del self.keys[n]
+        del self.entities[n]
+
+    def visible(self, viewport: pg.Rect, alpha: float = 1.0) -> list:
+        """Entities overlapping [viewport] (in map
+        pixels) when drawn at [alpha] between ticks,
+        in draw order. Only rows that can reach the
+        viewport are scanned.
+        """
+        first = bisect_left(self.keys, ((viewport.top - self.tallest) / 16 - 1,))
+        last = bisect_right(self.keys, (viewport.bottom / 16 + 2, float('inf')))
+
+        entities = []
+        for entity in self.entities[first:last]:
+            x, y = entity.coords(alpha)
+            width, height = entity.image.get_size()
+            if x < viewport.right and x + width > viewport.left \
+                and y < viewport.bottom and y + height > viewport.top:
+                entities.append(entity)
+
+        return entities
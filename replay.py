@@ -0,0 +1,51 @@
+import json
+
+import pygame as pg
+
+
+class InputScript():
+    """Key presses and releases by simulation tick,
+    replayed in place of real keyboard events.
+
+    Stored as JSON:
+        {"ticks": 600, "events": [[12, "down", "w"], [40, "up", "w"]]}
+    where "ticks" is how long the script runs and
+    keys use pygame key names.
+    """
+    def __init__(self, events: list[list] = None, ticks: int = 0):
+        self.events = events or []  # [tick, 'down' | 'up', key name], in tick order
+        self.ticks  = ticks
+
+        self.by_tick = {}  # tick: pygame events
+        self.index_events()
+
+    def events_for_tick(self, tick: int) -> list[pg.event.Event]:
+        return self.by_tick.get(tick, [])
+
+    def index_events(self):
+        self.by_tick = {}
+        for tick, action, key in self.events:
+            event_type = pg.KEYDOWN if action == 'down' else pg.KEYUP
+            event = pg.event.Event(event_type, key=pg.key.key_code(key))
+            self.by_tick.setdefault(tick, []).append(event)
+
+    def is_finished(self, tick: int) -> bool:
+        return tick >= self.ticks
+
+    @classmethod
+    def load(cls, filepath: str):
+        with open(filepath) as f:
+            data = json.load(f)
+        return cls(data['events'], data['ticks'])
+
+    def record(self, tick: int, event: pg.event.Event):
+        action = 'down' if event.type == pg.KEYDOWN else 'up'
+        self.events.append([tick, action, pg.key.name(event.key)])
+        self.by_tick.setdefault(tick, []).append(event)
+        self.ticks = max(self.ticks, tick + 1)
+
+    def save(self, filepath: str, ticks: int):
+        self.ticks = max(self.ticks, ticks)
+        events = ',\n\t\t'.join(json.dumps(e) for e in self.events)
+        with open(filepath, 'w') as f:
+            f.write(f'{{\n\t"ticks": {self.ticks},\n\t"events": [\n\t\t{events}\n\t]\n}}\n')
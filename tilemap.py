@@ -0,0 +1,194 @@
+"""Store area maps as tiles instead of one image.
+
+    python tilemap.py [area name ...]
+
+slices each area's lib/maps/<name>.png (every
+area in the world file by default) into 16 pixel
+tiles, and writes one copy of each distinct tile
+to lib/tilemaps/<name>.png (the tileset) and the
+grid of tile indices to lib/tilemaps/<name>.json.
+An area uses its tilemap once its record has
+"tilemap": "<name>"; re-run this after editing
+the map image.
+"""
+import json
+import os
+import sys
+from collections import OrderedDict
+
+import numpy as np
+import pygame as pg
+
+from assets import asset_cache
+from pack import get_asset_pack
+from palette import BLACK
+
+
+CHUNK_LIMIT = 32       # Rendered chunks kept per tilemap
+CHUNK_TILES = 8        # Chunk edge, in tiles
+TILEMAP_DIR = os.path.join('lib', 'tilemaps')
+TILESET_COLUMNS = 16   # Tiles per row of a tileset image
+TILE_SIZE = 16         # Pixels
+
+CHUNK_EDGE = CHUNK_TILES * TILE_SIZE  # Pixels
+
+
+def build_tilemap(name: str) -> tuple[int]:
+    """Convert the map image of area [name].
+    Returns the number of distinct tiles and the
+    number of tiles in the grid.
+    """
+    formatted_name = name.lower().replace(' ', '_')
+    image = pg.image.load(os.path.join('lib', 'maps', f'{formatted_name}.png'))
+    width, height = image.get_size()
+    if width % TILE_SIZE or height % TILE_SIZE:
+        raise RuntimeError(f'Map of "{name}" is not a whole number of tiles: {width}x{height}')
+
+    pixels = pg.surfarray.array3d(image)
+    grid = np.zeros((width // TILE_SIZE, height // TILE_SIZE), dtype=np.uint16)
+    tiles = {}  # Tile pixels: index
+    origins = []  # Map pixel coords of each distinct tile
+    for x in range(grid.shape[0]):
+        for y in range(grid.shape[1]):
+            left, top = x * TILE_SIZE, y * TILE_SIZE
+            key = pixels[left:left + TILE_SIZE, top:top + TILE_SIZE].tobytes()
+            if key not in tiles:
+                tiles[key] = len(origins)
+                origins.append((left, top))
+            grid[x, y] = tiles[key]
+
+    rows = -(-len(origins) // TILESET_COLUMNS)
+    tileset = pg.Surface((TILESET_COLUMNS * TILE_SIZE, rows * TILE_SIZE))
+    tileset.fill(BLACK)
+    for n, origin in enumerate(origins):
+        tileset.blit(image, tile_coords(n), (origin, (TILE_SIZE, TILE_SIZE)))
+
+    os.makedirs(TILEMAP_DIR, exist_ok=True)
+    pg.image.save(tileset, os.path.join(TILEMAP_DIR, f'{formatted_name}.png'))
+
+    lines = ',\n'.join(f'        {json.dumps(row)}' for row in grid.T.tolist())
+    with open(os.path.join(TILEMAP_DIR, f'{formatted_name}.json'), 'w') as f:
+        f.write(f'{{\n    "tileSize": {TILE_SIZE},\n    "tiles": [\n{lines}\n    ]\n}}\n')
+
+    return len(origins), grid.size
+
+
+def tile_coords(index: int) -> tuple[int]:
+    """Top left of tile [index] in a tileset"""
+    return (index % TILESET_COLUMNS * TILE_SIZE, index // TILESET_COLUMNS * TILE_SIZE)
+
+
+class TileMap():
+    """An area's map as a tileset and a grid of
+    tile indices, drawn through square chunks.
+
+    Chunks are rendered on first use, with the
+    static doodads baked into them, and kept in a
+    small LRU cache, so memory grows with the
+    number of distinct tiles and visible chunks
+    rather than with the size of the map. Each
+    layer ('background', 'foreground') has its own
+    chunks; foreground chunks are keyed on black and
+    only exist where something was baked.
+    """
+    def __init__(self, tileset: pg.Surface, grid: np.ndarray):
+        self.grid    = grid  # (x, y): tile index
+
+        self.baked   = {}  # (layer, chunk x, chunk y): [(image, map coords)]
+        self.chunks  = OrderedDict()  # (layer, chunk x, chunk y): surface, least recently used first
+        self.rect    = pg.Rect(0, 0, grid.shape[0] * TILE_SIZE, grid.shape[1] * TILE_SIZE)
+        self.tiles   = [tileset.subsurface((tile_coords(n), (TILE_SIZE, TILE_SIZE)))
+                        for n in range(int(grid.max()) + 1)]
+
+    def bake(self, layer: str, image: pg.Surface, coords: tuple[int]):
+        """Draw [image] at [coords] (in map pixels)
+        into every chunk of [layer] it overlaps
+        """
+        rect = image.get_rect(topleft=coords).clip(self.rect)
+        for x in range(rect.left // CHUNK_EDGE, (rect.right - 1) // CHUNK_EDGE + 1):
+            for y in range(rect.top // CHUNK_EDGE, (rect.bottom - 1) // CHUNK_EDGE + 1):
+                self.baked.setdefault((layer, x, y), []).append((image, coords))
+                self.chunks.pop((layer, x, y), None)
+
+    def blits(self, layer: str, rect: pg.Rect, camera_offset: tuple[float]) -> list[tuple]:
+        """(surface, dest, area) blits drawing the part
+        of [layer] inside [rect] (in map pixels) to the
+        screen, at [camera_offset]
+        """
+        rect = rect.clip(self.rect)
+        if not rect:
+            return []
+
+        blits = []
+        for y in range(rect.top // CHUNK_EDGE, (rect.bottom - 1) // CHUNK_EDGE + 1):
+            for x in range(rect.left // CHUNK_EDGE, (rect.right - 1) // CHUNK_EDGE + 1):
+                chunk = self.chunk(layer, x, y)
+                if chunk is None:
+                    continue
+                left, top = x * CHUNK_EDGE, y * CHUNK_EDGE
+                part = rect.clip((left, top), chunk.get_size())
+                blits.append((chunk, (part.x + camera_offset[0], part.y + camera_offset[1]),
+                              (part.x - left, part.y - top, part.w, part.h)))
+
+        return blits
+
+    def chunk(self, layer: str, x: int, y: int) -> pg.Surface | None:
+        key = (layer, x, y)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        chunk = self.render_chunk(layer, x, y)
+        if chunk is not None:
+            self.chunks[key] = chunk
+            if len(self.chunks) > CHUNK_LIMIT:
+                self.chunks.popitem(last=False)
+        return chunk
+
+    @classmethod
+    def load(cls, name: str):
+        filepath = os.path.join(TILEMAP_DIR, f'{name}.json')
+        asset_pack = get_asset_pack()
+        grid = asset_pack and asset_pack.grid(filepath)  # Checked when packed
+        if grid is None:
+            with open(filepath) as f:
+                data = json.load(f)
+            if data['tileSize'] != TILE_SIZE:
+                raise RuntimeError(f'Tilemap "{name}" has {data["tileSize"]} pixel tiles, not {TILE_SIZE}')
+            grid = np.array(data['tiles'], dtype=np.uint16).T
+
+        tileset = asset_cache.image(os.path.join(TILEMAP_DIR, f'{name}.png'), convert=True)
+        return cls(tileset, grid)
+
+    def render_chunk(self, layer: str, x: int, y: int) -> pg.Surface | None:
+        """Chunk ([x], [y]) of [layer], or None for a
+        foreground chunk with nothing baked into it
+        """
+        baked = self.baked.get((layer, x, y), [])
+        if layer == 'foreground' and not baked:
+            return None
+
+        bounds = pg.Rect(x * CHUNK_EDGE, y * CHUNK_EDGE, CHUNK_EDGE, CHUNK_EDGE).clip(self.rect)
+        chunk = pg.Surface(bounds.size)
+        if layer == 'foreground':
+            chunk.fill(BLACK)
+            chunk.set_colorkey(BLACK)
+        else:
+            left, top = x * CHUNK_TILES, y * CHUNK_TILES
+            indices = self.grid[left:left + CHUNK_TILES, top:top + CHUNK_TILES]
+            chunk.blits([(self.tiles[n], (tx * TILE_SIZE, ty * TILE_SIZE))
+                         for (tx, ty), n in np.ndenumerate(indices)], doreturn=False)
+
+        for image, coords in baked:
+            chunk.blit(image, (coords[0] - bounds.x, coords[1] - bounds.y))
+
+        return chunk
+
+
+if __name__ == '__main__':
+    from map_registry import get_map_registry
+
+    for name in sys.argv[1:] or get_map_registry().names():
+        distinct, total = build_tilemap(name)
+        print(f'{name}: {distinct} distinct tiles of {total}')
@@ -1,34 +1,34 @@
-import os
-
-import pygame as pg
 from pygame.math import Vector2
 
+from animation import unit_animations
 from area import Area
-from palette import TRANSPARENT
+from controller import InputSnapshot, NO_INPUT
 from entity import Entity
 
 
 class Trainer(Entity):
+    __slots__ = ('input_counter', 'target_location')
+
+    # Unit sprites are 2 tiles tall but "stand on"
+    # the lower one, hence the Y offset of -1.
+    actions       = ('stand', 'run', 'walk')
+    entity_type   = 'unit'
+    grid_offset_y = -1  # Override
+    input_delay   = 3
+    walk_speed    = 0.1
+
     def __init__(self, location: Vector2):
-        # Entity is instanciated with a Y offset
-        # of -1 because unit sprites are 2 tiles
-        # tall but "stand on" the lower one.
         super().__init__(location, 'trainer')
 
-        self.actions         = ['stand', 'run', 'walk']
-        self.entity_type     = 'unit'
+        self.animations      = unit_animations(self.formatted_name, self.actions)
         self.frame_delay     = 7   # Override
-        self.grid_offset_y   = -1  # Override
         self.input_counter   = 0
-        self.input_delay     = 3
         self.target_location = self.grid_location
-        self.walk_speed      = 0.1
 
-        self.load_images()
         self.draw()
 
-    def coords(self) -> tuple[float]:
-        x, y = super().coords()
+    def coords(self, alpha: float = 1.0) -> tuple[float]:
+        x, y = super().coords(alpha)
         return x, y + self.grid_offset_y * 16
 
     def draw(self):
@@ -41,18 +41,6 @@ class Trainer(Entity):
 
         super().draw()
 
-    def load_images(self):
-        for action in self.actions:
-            self.images[action] = [
-                self.load_sheet(entity_type=self.entity_type, sheet_name=f'{self.formatted_name}_{action}_up.png',
-                                sheet_width=16, flip=False),
-                self.load_sheet(entity_type=self.entity_type, sheet_name=f'{self.formatted_name}_{action}_down.png',
-                                sheet_width=16, flip=False),
-                self.load_sheet(entity_type=self.entity_type, sheet_name=f'{self.formatted_name}_{action}_left.png',
-                                sheet_width=16, flip=False),
-                self.load_sheet(entity_type=self.entity_type, sheet_name=f'{self.formatted_name}_{action}_left.png',
-                                sheet_width=16, flip=True)]
-
     def move(self, area: Area, B_pressed: bool, run_enabled: bool):
         self.set_action('run' if B_pressed and run_enabled else 'walk')
 
@@ -96,6 +84,18 @@ class Trainer(Entity):
 
     def set_grid_location(self, location: tuple[int] | Vector2):
         self.grid_location = Vector2(location)
+        self.previous_location = Vector2(location)  # Teleport; don't interpolate
+
+    def shift(self, offset: tuple[int]):
+        """Move by [offset] tiles without interrupting
+        the current step, e.g. when the area the
+        location is measured from changes.
+        """
+        shift = Vector2(offset)
+        if self.target_location is not self.grid_location:
+            self.target_location = self.target_location + shift
+        self.grid_location.update(self.grid_location + shift)
+        self.previous_location.update(self.previous_location + shift)
 
     def snap_location_to_grid(self):
         '''Vector2.move_towards_ip will never
@@ -117,8 +117,9 @@ class Trainer(Entity):
         self.target_location = self.grid_location
         self.draw()
 
-    def update(self, area: Area, direction: int|None=None, B_pressed: bool=False, run_enabled: bool=True):
+    def update(self, area: Area, inputs: InputSnapshot=NO_INPUT, run_enabled: bool=True):
+        self.previous_location.update(self.grid_location)
         self.snap_location_to_grid()
-        self.set_action_from_input(area, direction, B_pressed, run_enabled)
+        self.set_action_from_input(area, inputs.dpad, inputs.is_down('B'), run_enabled)
         super().advance_animation()
         self.draw()
@@ -0,0 +1,33 @@
+import pygame as pg
+
+from palette import BLACK
+
+
+def fade_to_black(old: pg.Surface, render_new, steps: int, buffer: pg.Surface):
+    """Fade [old] out to black, then fade in the
+    snapshot returned by [render_new], which is only
+    called once the screen is black. Yields [buffer],
+    redrawn for each frame.
+    """
+    alpha_step = 255 / steps
+    blackout = pg.Surface(buffer.get_size())
+    blackout.fill(BLACK)
+
+    for n in range(steps):
+        blackout.set_alpha(alpha_step * n)
+        buffer.blit(old, (0, 0))
+        buffer.blit(blackout, (0, 0))
+        yield buffer
+
+    new = render_new()
+    for n in range(steps):
+        new.set_alpha(alpha_step * n)
+        buffer.fill(BLACK)
+        buffer.blit(new, (0, 0))
+        yield buffer
+
+
+# style: generator function taking (old, render_new, steps, buffer)
+TRANSITIONS = {
+    'fade to black': fade_to_black
+}
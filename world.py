@@ -0,0 +1,118 @@
+import pygame as pg
+from pygame.math import Vector2
+
+from area import Area
+from area_pool import AreaPool
+from map_registry import get_map_registry
+
+
+class World():
+    """Outdoor areas joined at their edges by the
+    "connections" in the world file, walked across
+    without a transition.
+
+    Positions are in the tiles of the current area;
+    each loaded neighbour sits at its connection
+    offset, so coordinates carry on across borders.
+    The neighbours of the current area are built in
+    the background as soon as it becomes current,
+    and dropped once they no longer border it, so
+    at most one ring of areas is held at a time.
+    """
+    def __init__(self, area_pool: AreaPool, area: Area):
+        self.area_pool  = area_pool
+        self.area       = area  # Current area, holding the trainer
+
+        self.neighbours = {}  # name: (Area, (x, y) tile offset), loaded only
+        self.offsets    = {}  # name: (x, y) tile offset, of every connected area
+        self.rect       = area.rect.copy()  # Loaded areas' extent, in map pixels
+
+        self.connect()
+
+    def connect(self):
+        """Start loading the current area's
+        neighbours and drop any others
+        """
+        self.offsets = dict(get_map_registry().connections(self.area.name))
+        for name in list(self.neighbours):
+            if name not in self.offsets:
+                del self.neighbours[name]
+            else:
+                self.neighbours[name] = (self.neighbours[name][0], self.offsets[name])
+
+        for name in self.offsets:
+            if name not in self.neighbours:
+                self.area_pool.prefetch(name)
+
+        self.update_rect()
+
+    def crossing(self, location: Vector2) -> tuple[Area, tuple[int]] | None:
+        """The loaded neighbour holding [location], and
+        its offset, if [location] is off the current
+        area
+        """
+        if self.area.rect.collidepoint(location.x * 16, location.y * 16):
+            return None
+
+        for area, offset in self.neighbours.values():
+            if area.rect.collidepoint((location.x - offset[0]) * 16, (location.y - offset[1]) * 16):
+                return area, offset
+
+        return None
+
+    def enter(self, area: Area, offset: tuple[int]):
+        """Make the neighbour [area], at [offset],
+        the current area. The old current area stays
+        loaded as one of its neighbours.
+        """
+        previous = self.area
+        self.neighbours.pop(area.name)
+        self.neighbours[previous.name] = (previous, (-offset[0], -offset[1]))
+        self.area = area
+        self.connect()
+
+    def is_passable(self, location: Vector2) -> bool:
+        """Off the current area, a tile is only
+        passable in a neighbour that has loaded
+        """
+        if self.area.rect.collidepoint(location.x * 16, location.y * 16):
+            return self.area.is_passable(location)
+
+        for area, offset in self.neighbours.values():
+            local = location - Vector2(offset)
+            if area.rect.collidepoint(local.x * 16, local.y * 16):
+                return area.is_passable(local)
+
+        return False
+
+    def update(self):
+        """Pick up neighbours that finished loading
+        and animate the loaded ones
+        """
+        loaded = False
+        for name, offset in self.offsets.items():
+            if name not in self.neighbours and self.area_pool.ready(name):
+                self.neighbours[name] = (self.area_pool.get(name), offset)
+                loaded = True
+        if loaded:
+            self.update_rect()
+
+        for area, _ in self.neighbours.values():
+            area.update()
+
+    def update_rect(self):
+        self.rect = self.area.rect.copy()
+        for area, offset in self.neighbours.values():
+            self.rect.union_ip(area.rect.move(offset[0] * 16, offset[1] * 16))
+
+    def visible(self, viewport: pg.Rect) -> list[tuple[Area, tuple[int]]]:
+        """Loaded neighbours overlapping [viewport] (in
+        map pixels), each with its offset in pixels
+        """
+        placed = []
+        for area, offset in self.neighbours.values():
+            pixels = (offset[0] * 16, offset[1] * 16)
+            if area.rect.move(pixels).colliderect(viewport):
+                placed.append((area, pixels))
+
+        return placed